@@ -0,0 +1,202 @@
+"""
+Benchmarks del API de insight (/analizar/) y del separador de sentimiento (tellapart).
+
+Para cada dataset (sintético o el CSV real de Trustpilot) mide por etapas:
+parse, normalize, match, paginate, serialize, la llamada completa al API con
+TestClient (primera vez y desde caché) y el scoring de sentimiento.
+Los resultados se guardan en JSON para comparar entre versiones.
+
+    python bench_insight.py --sizes 1000,10000,100000
+    python bench_insight.py --sizes 1000000 --seps ";" --encodings utf-8 --langs de
+    python bench_insight.py --baseline results/bench_20250101_120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(REPO_ROOT, "analysis", "insight"))
+
+import pandas as pd  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import insight  # noqa: E402
+import normalizer  # noqa: E402
+import tellapart  # noqa: E402
+from csv_loader import load_csv  # noqa: E402
+from synthetic import HEADERS, generate_csv  # noqa: E402
+
+REAL_CSV = os.path.join(REPO_ROOT, "notebooks", "OBB_Reviews_Completo_TP.csv")
+RESULTS_DIR = os.path.join(HERE, "results")
+SEPARATOR_NAMES = {';': 'semicolon', ',': 'comma', '\t': 'tab'}
+
+
+def best_of(fn, repeat):
+    """Mejor tiempo (s) de `repeat` ejecuciones y el último resultado."""
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 6), result
+
+
+def bench_case(name, contents, lang, col_subj, col_msg, col_date, repeat, client, page_limit=50):
+    stages = {}
+    form = {'language': lang, 'type': 'false', 'col_subj': col_subj, 'col_msg': col_msg,
+            'col_date': col_date, 'page': '1', 'limit': str(page_limit)}
+
+    # --- Etapas aisladas (mismo camino de código que el endpoint) ---
+    stages['parse'], (df, _) = best_of(lambda: load_csv(contents), repeat)
+    columns = insight.resolve_columns(df.columns, col_subj, col_msg, col_date)
+    matcher = insight.resolve_matcher(lang, False)
+    subjects = df[columns['subj']].fillna("").astype(str)
+
+    def normalize():
+        normalizer._normalize_cached.cache_clear()
+        return normalizer.normalize_series(subjects)
+
+    stages['normalize'], search_series = best_of(normalize, repeat)
+    stages['match'], _ = best_of(lambda: matcher.categorize(search_series), repeat)
+
+    dataset = insight.analyze_dataset(contents, lang, col_subj, col_msg, col_date, False)
+    pages = max(1, min(20, len(dataset.df) // page_limit))
+    stages['paginate'], page = best_of(
+        lambda: [insight.build_page(dataset, p, page_limit) for p in range(1, pages + 1)][-1], repeat)
+    stages['paginate'] = round(stages['paginate'] / pages, 6)  # por página
+    stages['serialize'], _ = best_of(lambda: json.dumps(page, ensure_ascii=False), repeat)
+
+    # --- API completa vía TestClient ---
+    def api_call():
+        response = client.post('/analizar/', files={'file': ('bench.csv', contents)}, data=form)
+        response.raise_for_status()
+        return response.json()
+
+    def api_first():
+        insight.DATASET_CACHE.clear()
+        return api_call()
+
+    stages['api_first'], _ = best_of(api_first, repeat)
+    stages['api_cached'], _ = best_of(api_call, repeat)
+
+    # --- Sentimiento (tellapart) ---
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as fh:
+        fh.write(contents)
+        tmp_path = fh.name
+    try:
+        stages['sentiment_load'], _ = best_of(lambda: tellapart.load_dataset(tmp_path), repeat)
+    finally:
+        os.unlink(tmp_path)
+    sentiment_lang = lang if lang in tellapart.SENTIMENT_LEXICON else 'de'
+    stages['sentiment_score'], _ = best_of(
+        lambda: [tellapart.calculate_sentiment_score(t, lang=sentiment_lang) for t in subjects], repeat)
+
+    return {
+        'name': name,
+        'rows': len(df),
+        'bytes': len(contents),
+        'language': lang,
+        'stages': stages,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    """Imprime la relación nuevo/antiguo por etapa para los casos comunes."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {c['name']: c for c in json.load(fh)['cases']}
+
+    print(f"\n📈 Comparación con {baseline_path} (ratio < 1 = más rápido)")
+    for case in results['cases']:
+        old = baseline.get(case['name'])
+        if not old:
+            continue
+        ratios = {stage: round(t / old['stages'][stage], 2)
+                  for stage, t in case['stages'].items() if old['stages'].get(stage)}
+        flagged = [s for s, r in ratios.items() if r > 1.2]
+        marker = " ⚠️ regresión en " + ", ".join(flagged) if flagged else ""
+        print(f"  {case['name']}: {ratios}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del API de insight y de tellapart.")
+    parser.add_argument("--sizes", default="1000,10000", help="Filas por dataset sintético (ej: 1000,100000,1000000)")
+    parser.add_argument("--seps", default=";,comma,tab", help="Separadores: ';', 'comma', 'tab'")
+    parser.add_argument("--encodings", default="utf-8,latin-1")
+    parser.add_argument("--langs", default="es,en,de,fr")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-real", action="store_true", help="No incluir OBB_Reviews_Completo_TP.csv")
+    parser.add_argument("--out", default=None, help="Archivo JSON de salida (por defecto results/bench_<fecha>.json)")
+    parser.add_argument("--baseline", default=None, help="JSON anterior para detectar regresiones")
+    args = parser.parse_args()
+
+    seps = [{'comma': ',', 'tab': '\t', 'semicolon': ';'}.get(s, s) for s in args.seps.split(',')]
+    client = TestClient(insight.app)
+    cases = []
+
+    # Calentamiento: arranca el pool de procesos fuera de las mediciones
+    warmup = generate_csv(100, 'de', ';', 'utf-8')
+    client.post('/analizar/', files={'file': ('warmup.csv', warmup)},
+                data={'language': 'de', 'type': 'false', 'col_subj': 'Betreff', 'col_msg': 'Inhalt'})
+
+    if not args.no_real and os.path.exists(REAL_CSV):
+        with open(REAL_CSV, 'rb') as fh:
+            contents = fh.read()
+        print("⏱️ real: OBB_Reviews_Completo_TP.csv")
+        cases.append(bench_case("real_trustpilot", contents, 'de', "Asunto", "Reseña", "Fecha", args.repeat, client))
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for lang in args.langs.split(','):
+            for sep in seps:
+                for encoding in args.encodings.split(','):
+                    name = f"synthetic_{lang}_{size}_{SEPARATOR_NAMES.get(sep, sep)}_{encoding}"
+                    print(f"⏱️ {name}")
+                    contents = generate_csv(size, lang, sep, encoding)
+                    subj, msg, date, _ = HEADERS[lang]
+                    case = bench_case(name, contents, lang, subj, msg, date, args.repeat, client)
+                    case.update({'separator': sep, 'encoding': encoding})
+                    cases.append(case)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'workers': insight.EXECUTOR.workers,
+        'cases': cases,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, indent=2, ensure_ascii=False)
+
+    print("\n" + "-" * 30)
+    for case in cases:
+        print(f"{case['name']} ({case['rows']} filas): " +
+              ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in case['stages'].items()))
+    print(f"💾 Resultados en {out}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    insight.EXECUTOR.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Generador de CSVs sintéticos de feedback multilingüe (es/en/de/fr) para benchmarks.
+
+Las filas mezclan términos reales de los diccionarios y del léxico de
+sentimiento con texto de relleno, para que el matching trabaje como en producción.
+
+    python synthetic.py --rows 100000 --sep ";" --encoding latin-1 --out feedback_100k.csv
+"""
+import argparse
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+LANGUAGES = ['es', 'en', 'de', 'fr']
+
+HEADERS = {
+    'es': ["Asunto", "Contenido", "Fecha", "Calificación"],
+    'en': ["Subject", "Content", "Date", "Rating"],
+    'de': ["Betreff", "Inhalt", "Datum", "Bewertung"],
+    'fr': ["Title", "Message", "Date", "Rating"],
+}
+
+KEYWORDS = {
+    'es': ['retraso', 'demora', 'suciedad', 'limpieza', 'asiento', 'calefacción', 'puerta', 'avería',
+           'personal', 'taquilla', 'compensación', 'señal', 'gracias', 'excelente', 'pésimo', 'tarde'],
+    'en': ['delay', 'late', 'dirty', 'cleaning', 'seat', 'heating', 'door', 'broken', 'staff',
+           'ticket', 'refund', 'signal', 'thanks', 'great', 'terrible', 'angry'],
+    'de': ['Verspätung', 'Ausfall', 'schmutzig', 'Reinigung', 'Sitzplatz', 'Heizung', 'Tür', 'Störung',
+           'Personal', 'Fahrkarte', 'Entschädigung', 'Lob', 'danke', 'pünktlich', 'enttäuscht', 'Chaos'],
+    'fr': ['retard', 'attente', 'propreté', 'siège', 'chauffage', 'porte', 'panne', 'guichet',
+           'personnel', 'réservation', 'éclairage', 'accessibilité', 'aimable', 'bon'],
+}
+
+FILLER = {
+    'es': ['el', 'tren', 'a', 'Viena', 'hoy', 'muy', 'con', 'sin', 'Título', 'viaje', 'niño', 'estación'],
+    'en': ['the', 'train', 'to', 'Vienna', 'today', 'very', 'with', 'no', 'journey', 'station', 'my'],
+    'de': ['der', 'Zug', 'nach', 'Wien', 'heute', 'sehr', 'mit', 'ohne', 'Reise', 'Bahnhof', 'für'],
+    'fr': ['le', 'train', 'vers', 'Vienne', 'aujourd\'hui', 'très', 'avec', 'sans', 'voyage', 'gare', 'été'],
+}
+
+
+def _sentence(rng, lang, min_words, max_words):
+    words = [rng.choice(FILLER[lang]) for _ in range(rng.randint(min_words, max_words))]
+    for _ in range(rng.randint(0, 2)):
+        words.insert(rng.randint(0, len(words)), rng.choice(KEYWORDS[lang]))
+    return ' '.join(words).capitalize()
+
+
+def generate_rows(n_rows, lang, seed=0, start=date(2023, 1, 1), days=1000):
+    """Genera filas (asunto, contenido, fecha, calificación) reproducibles."""
+    rng = random.Random(seed)
+    for i in range(n_rows):
+        subject = "Sin Título" if lang == 'es' and rng.random() < 0.05 else _sentence(rng, lang, 2, 6)
+        body = _sentence(rng, lang, 10, 40)
+        if rng.random() < 0.1:
+            body = body + '\n' + _sentence(rng, lang, 5, 15)  # campos multilínea como en Trustpilot
+        day = (start + timedelta(days=rng.randrange(days))).isoformat()
+        yield subject, body, day, str(rng.randint(1, 5))
+
+
+def generate_csv(n_rows, lang='de', sep=';', encoding='utf-8', seed=0):
+    """Devuelve los bytes de un CSV sintético con el separador y la codificación pedidos."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=sep, lineterminator='\n')
+    writer.writerow(HEADERS[lang])
+    writer.writerows(generate_rows(n_rows, lang, seed))
+    return buffer.getvalue().encode(encoding, errors='replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un CSV sintético de feedback.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--lang", choices=LANGUAGES, default='de')
+    parser.add_argument("--sep", default=';')
+    parser.add_argument("--encoding", default='utf-8')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    sep = '\t' if args.sep in ('\\t', 'tab') else args.sep
+    with open(args.out, 'wb') as fh:
+        fh.write(generate_csv(args.rows, args.lang, sep, args.encoding, args.seed))
+    print(f"✅ {args.rows} filas ({args.lang}, sep={sep!r}, {args.encoding}) en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Índice precalculado de categorías y sentimiento para servir consultas sin re-analizar.
+
+Un comando batch categoriza un dataset UNA vez con los dos diccionarios
+(resumido y completo) y el léxico de sentimiento, y guarda:
+
+    <INSIGHT_INDEX_DIR>/<index_id>/rows.parquet   una fila por reseña (texto, fecha,
+                                                  puntuación, sentimiento, máscaras)
+    <INSIGHT_INDEX_DIR>/<index_id>/meta.json      agregados y orden de bits de cada diccionario
+    <INSIGHT_INDEX_DIR>/<index_id>/rollups.parquet rollup diario por diccionario (ver rollups.py)
+
+Los endpoints /indices/ del API sólo leen estos archivos: estadísticas y páginas
+filtradas se resuelven con operaciones vectoriales sobre las máscaras.
+
+    python analysis_index.py ../../notebooks/OBB_Reviews_Completo_TP.csv --id obb --language de
+    python analysis_index.py review_store/ --id almacen_de --language de
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from normalizer import normalize_series
+from rollups import ROLLUP_FILE, daily_rollup
+
+INDEX_ROWS = "rows.parquet"
+INDEX_META = "meta.json"
+INDEX_VERSION = 2
+
+# type del API -> nombre del diccionario en el índice (archivos de dictionaries/, ver dictionaries.py)
+DICTIONARY_KEYS = {True: 'resumido', False: 'completo'}
+SENTIMENT_FILTERS = ['positive', 'negative', 'neutral']
+VALID_INDEX_ID = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def mask_column(type):
+    return f"mask_{DICTIONARY_KEYS[bool(type)]}"
+
+
+def build_index(df, columns, language, matchers, sentiment_engine, out_dir, source=None):
+    """
+    Categoriza y puntúa un frame completo y escribe el índice en out_dir.
+    columns: {'subj', 'msg', 'date' (o None), 'rating' (o None)}
+    matchers: {True: KeywordMatcher, False: KeywordMatcher}
+    Misma limpieza que /analizar/ (filas sin mensaje fuera, row_id = posición original + 1).
+    Devuelve el meta escrito.
+    """
+    start = time.perf_counter()
+    col_subj, col_msg, col_date, col_rating = columns['subj'], columns['msg'], columns.get('date'), columns.get('rating')
+
+    df = df.dropna(subset=[col_msg])
+    subjects = df[col_subj].fillna("").astype(str)
+
+    rows = pd.DataFrame({
+        'row_id': (df.index + 1).astype(np.int64),
+        'date': (pd.to_datetime(df[col_date], errors='coerce').dt.strftime('%Y-%m-%d')
+                 if col_date else pd.Series(None, index=df.index, dtype=object)),
+        'subject': subjects,
+        'review': df[col_msg].astype(str),
+        'rating': (pd.to_numeric(df[col_rating], errors='coerce') if col_rating
+                   else pd.Series(np.nan, index=df.index)).astype('Int8'),
+    })
+
+    # Sentimiento sobre el asunto, con la misma regla que tellapart.py
+    scores = sentiment_engine.score_series(subjects, flag_terms=('lob',))
+    rows['sentiment'] = scores['score'].astype(np.int32)
+    rows['positive'] = (scores['score'] > 0) | scores['has_lob']
+
+    search_series = normalize_series(subjects)
+    dictionaries = {}
+    rollups = []
+    for type, key in DICTIONARY_KEYS.items():
+        matcher = matchers[type]
+        masks = matcher.categorize(search_series)['category_mask'].to_numpy()
+        rows[mask_column(type)] = masks
+        rollups.append(daily_rollup(rows['date'], masks, matcher.category_bits, rows['sentiment']).assign(dictionary=key))
+        dictionaries[key] = {
+            'categories': matcher.categories,
+            'category_counts': matcher.category_counts(masks),
+            'uncategorized': int(np.count_nonzero(masks == 0)),
+            'sentiment_by_category': {
+                cat: round(float(rows['sentiment'][(masks & bit) != 0].mean()), 4)
+                for cat, bit in matcher.category_bits.items() if np.any(masks & bit)
+            },
+        }
+
+    meta = {
+        'version': INDEX_VERSION,
+        'language': language,
+        'source': source,
+        'dictionary_version': matchers[True].version,
+        'rows': len(rows),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'build_seconds': None,
+        'date_range': [rows['date'].min(), rows['date'].max()] if rows['date'].notna().any() else None,
+        'sentiment': {
+            'mean': round(float(rows['sentiment'].mean()), 4) if len(rows) else 0.0,
+            'positive': int(rows['positive'].sum()),
+            'negative': int((rows['sentiment'] < 0).sum()),
+            'neutral': int(((rows['sentiment'] == 0) & ~rows['positive']).sum()),
+        },
+        'dictionaries': dictionaries,
+    }
+
+    # Se escribe en un directorio temporal y se renombra: un lector nunca ve un índice a medias
+    tmp_dir = f"{out_dir}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_dir)
+    rows.reset_index(drop=True).to_parquet(os.path.join(tmp_dir, INDEX_ROWS), index=False)
+    pd.concat(rollups, ignore_index=True).to_parquet(os.path.join(tmp_dir, ROLLUP_FILE), index=False)
+    meta['build_seconds'] = round(time.perf_counter() - start, 3)
+    with open(os.path.join(tmp_dir, INDEX_META), 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return meta
+
+
+class AnalysisIndex:
+    """Índice cargado en memoria (memory-map del Parquet) listo para consultas."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_META), encoding='utf-8') as fh:
+            self.meta = json.load(fh)
+        self.rows = pd.read_parquet(os.path.join(path, INDEX_ROWS), memory_map=True)
+        self.mtime = os.path.getmtime(os.path.join(path, INDEX_META))
+        # Los índices anteriores a la versión 2 no tienen rollups (hay que reconstruirlos)
+        rollup_path = os.path.join(path, ROLLUP_FILE)
+        self.rollups = pd.read_parquet(rollup_path) if os.path.exists(rollup_path) else None
+
+    def daily_rollup(self, type):
+        """Rollup diario del diccionario elegido, o None si el índice no lo tiene."""
+        if self.rollups is None:
+            return None
+        rollup = self.rollups[self.rollups['dictionary'] == DICTIONARY_KEYS[bool(type)]]
+        return rollup.drop(columns='dictionary')
+
+    def category_bits(self, type):
+        categories = self.meta['dictionaries'][DICTIONARY_KEYS[bool(type)]]['categories']
+        return {cat: 1 << i for i, cat in enumerate(categories)}
+
+    def category_names(self, type, mask):
+        return [cat for cat, bit in self.category_bits(type).items() if mask & bit]
+
+    def filter_mask(self, type, category=None, date_from=None, date_to=None, rating=None, sentiment=None):
+        """
+        Máscara booleana de las filas que cumplen todos los filtros.
+        category: nombre de categoría o 'sin_categoria'; rating: lista de puntuaciones;
+        sentiment: 'positive', 'negative' o 'neutral'.
+        """
+        rows = self.rows
+        keep = np.ones(len(rows), dtype=bool)
+
+        if category:
+            masks = rows[mask_column(type)].to_numpy()
+            if category == 'sin_categoria':
+                keep &= masks == 0
+            else:
+                bit = self.category_bits(type).get(category)
+                if bit is None:
+                    raise KeyError(category)
+                keep &= (masks & bit) != 0
+
+        # Fechas 'YYYY-MM-DD': el orden de texto es el orden cronológico
+        if date_from or date_to:
+            dates = rows['date'].fillna('').to_numpy(dtype=object)
+            if date_from:
+                keep &= dates >= date_from
+            if date_to:
+                keep &= (dates <= date_to) & (dates != '')
+
+        if rating:
+            keep &= rows['rating'].isin(rating).fillna(False).to_numpy(dtype=bool)
+
+        if sentiment == 'positive':
+            keep &= rows['positive'].to_numpy()
+        elif sentiment == 'negative':
+            keep &= rows['sentiment'].to_numpy() < 0
+        elif sentiment == 'neutral':
+            keep &= (rows['sentiment'].to_numpy() == 0) & ~rows['positive'].to_numpy()
+
+        return keep
+
+    def select(self, keep, start, end):
+        """Filas [start, end) de las que cumplen la máscara, en el orden del índice."""
+        positions = np.flatnonzero(keep)[start:end]
+        return self.rows.iloc[positions]
+
+
+def load_input(path, columns):
+    """CSV (cargador compartido) o directorio de un almacén Parquet de reseñas."""
+    if os.path.isdir(path):
+        from review_store import ReviewStore
+
+        df = ReviewStore(path).read(['Subject', 'Review', 'Date', 'Rating'])
+        return df, {'subj': 'Subject', 'msg': 'Review', 'date': 'Date', 'rating': 'Rating'}
+
+    from csv_loader import load_csv
+    from insight import POSSIBLE_RATING_COLS, resolve_columns
+
+    df, _ = load_csv(path)
+    resolved = resolve_columns(df.columns, columns['subj'], columns['msg'], columns['date'])
+    resolved['rating'] = next((c for c in POSSIBLE_RATING_COLS if c in df.columns), None)
+    return df, resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye un índice precalculado de categorías y sentimiento.")
+    parser.add_argument("input", help="CSV o directorio de un almacén Parquet de reseñas")
+    parser.add_argument("--id", required=True, help="Identificador del índice (nombre del directorio)")
+    parser.add_argument("--language", default="es")
+    parser.add_argument("--col-subj", default="Asunto")
+    parser.add_argument("--col-msg", default="Contenido")
+    parser.add_argument("--col-date", default="Fecha")
+    parser.add_argument("--index-dir", default=os.getenv("INSIGHT_INDEX_DIR", "indices"))
+    args = parser.parse_args()
+
+    if not VALID_INDEX_ID.match(args.id):
+        parser.error("--id sólo admite letras, números, '_', '-' y '.'")
+
+    # Los diccionarios y el léxico viven en el API y en tellapart.py
+    from insight import get_matcher
+    from tellapart import SENTIMENT_ENGINES
+
+    df, columns = load_input(args.input, {'subj': args.col_subj, 'msg': args.col_msg, 'date': args.col_date})
+    matchers = {type: get_matcher(args.language, type) for type in DICTIONARY_KEYS}
+    engine = SENTIMENT_ENGINES.get(args.language, SENTIMENT_ENGINES['de'])
+
+    out_dir = os.path.join(args.index_dir, args.id)
+    meta = build_index(df, columns, args.language, matchers, engine, out_dir, source=os.path.abspath(args.input))
+    print(f"✅ Índice '{args.id}' en {out_dir}: {meta['rows']} filas en {meta['build_seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Cargador CSV compartido (API /analizar/ y tellapart.py).
+
+En lugar de probar separadores y codificaciones parseando el archivo completo
+hasta siete veces, se inspecciona sólo un prefijo acotado de los bytes para
+detectar BOM/codificación, separador y cabecera, y después se parsea UNA vez
+con el lector de pyarrow (si está instalado) o con el motor C de pandas.
+
+Uso rápido para medir un archivo:
+    python csv_loader.py Kundenemails-deutsch_5000.csv
+"""
+import codecs
+import csv
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow es opcional
+    pa = None
+    pa_csv = None
+
+SNIFF_BYTES = 64 * 1024
+CHUNK_ROWS = 50000
+SEPARATORS = [';', ',', '\t', '|']
+
+# Mismos valores nulos por defecto que pandas.read_csv, para que ambos motores den el mismo frame
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+class CSVLoadError(ValueError):
+    """No se pudo interpretar el archivo como CSV."""
+
+
+def detect_encoding(prefix, complete):
+    """BOM primero; si no hay, UTF-8 estricto sobre el prefijo y si falla Latin-1."""
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, True
+
+    try:
+        # final=False: un carácter multibyte cortado al final del prefijo no es un error
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=complete)
+        return 'utf-8', False
+    except UnicodeDecodeError:
+        return 'latin-1', False
+
+
+def _looks_like_data(fields):
+    """Una fila con algún campo numérico casi nunca es una cabecera."""
+    for field in fields:
+        try:
+            float(field.replace(',', '.'))
+            return True
+        except ValueError:
+            continue
+    return False
+
+
+def sniff_csv(prefix, complete=False):
+    """
+    Detecta codificación, separador y cabecera a partir de un prefijo de bytes.
+    complete=True indica que el prefijo es el archivo entero.
+    """
+    encoding, bom = detect_encoding(prefix, complete)
+    text = prefix.decode(encoding, errors='ignore')
+
+    sep = None
+    header_fields = None
+    best_width = 1
+    for candidate in SEPARATORS:
+        rows = list(csv.reader(io.StringIO(text), delimiter=candidate))
+        if not complete and len(rows) > 1:
+            rows = rows[:-1]  # el último registro del prefijo puede estar cortado
+        rows = [r for r in rows if r]
+        if not rows:
+            continue
+
+        width = len(rows[0])
+        if width < 2:
+            continue
+
+        # El motor C falla si una fila trae más campos que la cabecera
+        consistent = all(len(r) <= width for r in rows[1:])
+        if consistent:
+            sep, header_fields = candidate, rows[0]
+            break
+        if width > best_width:
+            best_width, sep, header_fields = width, candidate, rows[0]
+
+    has_header = header_fields is not None and not _looks_like_data(header_fields)
+
+    return {
+        'encoding': encoding,
+        'bom': bom,
+        'sep': sep,
+        'header': has_header,
+        'columns': header_fields or [],
+    }
+
+
+def _read_with_pyarrow(source, dialect):
+    read_options = pa_csv.ReadOptions(
+        encoding=dialect['encoding'],
+        autogenerate_column_names=not dialect['header'],
+        block_size=1 << 22,
+    )
+    parse_options = pa_csv.ParseOptions(delimiter=dialect['sep'], newlines_in_values=True)
+    # Todo como texto, igual que dtype=str en pandas
+    names = dialect['columns'] if dialect['header'] else [f"f{i}" for i in range(len(dialect['columns']))]
+    convert_options = pa_csv.ConvertOptions(
+        null_values=NA_VALUES,
+        strings_can_be_null=True,
+        column_types={name: pa.string() for name in names},
+    )
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    table = pa_csv.read_csv(source, read_options=read_options,
+                            parse_options=parse_options, convert_options=convert_options)
+    if len(set(table.column_names)) != len(table.column_names):
+        raise CSVLoadError("Columnas duplicadas")
+    df = table.to_pandas()
+    if not dialect['header']:
+        df.columns = range(len(df.columns))
+    return df
+
+
+def _read_with_pandas(source, dialect):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return pd.read_csv(source, sep=dialect['sep'], encoding=dialect['encoding'],
+                       header=0 if dialect['header'] else None, dtype=str)
+
+
+def load_csv(source, sniff_bytes=SNIFF_BYTES, use_pyarrow=True):
+    """
+    Carga un CSV desde bytes o ruta en un solo parseo.
+    Devuelve (DataFrame, info) donde info incluye el dialecto detectado y los tiempos.
+    """
+    t0 = time.perf_counter()
+
+    if isinstance(source, (bytes, bytearray)):
+        total_bytes = len(source)
+        prefix = bytes(source[:sniff_bytes])
+    else:
+        total_bytes = os.path.getsize(source)
+        with open(source, 'rb') as fh:
+            prefix = fh.read(sniff_bytes)
+
+    dialect = sniff_csv(prefix, complete=total_bytes <= len(prefix))
+    t_sniff = time.perf_counter()
+
+    df = None
+    engine = None
+    if dialect['sep'] is not None:
+        attempts = []
+        if use_pyarrow and pa_csv is not None:
+            attempts.append(('pyarrow', _read_with_pyarrow))
+        attempts.append(('c', _read_with_pandas))
+
+        for name, reader in attempts:
+            try:
+                df = reader(source, dialect)
+                engine = name
+                break
+            except Exception:
+                # El prefijo decía UTF-8 pero el resto del archivo no lo es
+                if dialect['encoding'] == 'utf-8' and name == 'c':
+                    try:
+                        dialect = dict(dialect, encoding='latin-1')
+                        df = reader(source, dialect)
+                        engine = name
+                        break
+                    except Exception:
+                        pass
+                continue
+
+    if df is None or len(df.columns) < 2:
+        # Último recurso: el sniffer lento de pandas (como antes)
+        try:
+            fallback = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+            df = pd.read_csv(fallback, sep=None, engine='python', encoding='utf-8', dtype=str)
+            engine = 'python'
+        except Exception as e:
+            raise CSVLoadError(f"No se pudo leer el archivo CSV: {e}")
+
+    t_parse = time.perf_counter()
+
+    info = dict(dialect)
+    info.update({
+        'engine': engine,
+        'bytes': total_bytes,
+        'rows': len(df),
+        'sniff_ms': round((t_sniff - t0) * 1000, 3),
+        'parse_ms': round((t_parse - t_sniff) * 1000, 3),
+    })
+    return df, info
+
+
+def iter_csv_chunks(fileobj, chunksize=CHUNK_ROWS, sniff_bytes=SNIFF_BYTES):
+    """
+    Versión incremental para archivos grandes: detecta el dialecto con el prefijo
+    y devuelve (dialecto, iterador de DataFrames de `chunksize` filas).
+    La memoria queda acotada por el tamaño del chunk, no por el del archivo.
+    """
+    prefix = fileobj.read(sniff_bytes)
+    fileobj.seek(0)
+
+    dialect = sniff_csv(prefix, complete=len(prefix) < sniff_bytes)
+    if dialect['sep'] is None:
+        raise CSVLoadError("No se pudo detectar el separador del CSV.")
+
+    # No se puede volver a parsear desde el principio: bytes inválidos se sustituyen
+    reader = pd.read_csv(fileobj, sep=dialect['sep'], encoding=dialect['encoding'], encoding_errors='replace',
+                         header=0 if dialect['header'] else None, dtype=str, chunksize=chunksize)
+    return dialect, reader
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        df, info = load_csv(path)
+        print(f"{path}: {info['rows']} filas, {len(df.columns)} columnas | "
+              f"sep={info['sep']!r} enc={info['encoding']} cabecera={info['header']} motor={info['engine']} | "
+              f"sniff {info['sniff_ms']} ms, parse {info['parse_ms']} ms")
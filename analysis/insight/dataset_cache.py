@@ -0,0 +1,194 @@
+"""
+Caché LRU de datasets ya analizados para /analizar/.
+
+La clave es un hash del contenido del archivo más los parámetros de análisis
+(idioma, tipo de diccionario y columnas), así que pedir la página N de un
+archivo ya subido no vuelve a parsear, normalizar ni categorizar nada.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FILTERED_VIEWS = 8  # Vistas filtradas memorizadas por dataset
+
+
+def view_bytes(value):
+    """Bytes estimados de una vista añadida a un dataset (frames, arrays o tuplas/listas de ellos)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        # Listas de objetos compartidos con las categorías: sólo cuentan los punteros
+        return sum(view_bytes(v) if isinstance(v, (pd.DataFrame, np.ndarray, tuple, list)) else 8 for v in value)
+    return 0
+
+
+def dataset_key(contents, *params):
+    """Hash del contenido + parámetros. Se usa también como dataset_id público."""
+    h = hashlib.sha256(contents)
+    for p in params:
+        h.update(b'\x00' + str(p).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+class CachedDataset:
+    """Resultado completo de un análisis: frame limpio, categorías columnares y estadísticas."""
+
+    def __init__(self, df, categories, matcher, statistics, columns, language, type, parse_info=None):
+        self.df = df
+        self.categories = categories  # 'category_mask' + 'keywords_found', mismo índice que df
+        self.matcher = matcher
+        self.statistics = statistics
+        self.columns = columns  # {'subj': ..., 'msg': ..., 'date': ... o None}
+        self.language = language
+        self.type = type
+        self.parse_info = parse_info or {}  # Dialecto detectado y tiempos de parseo
+        self.rollup = None  # Rollup diario (rollups.py), se calcula en la primera consulta de tendencias
+        self.duplicates = None  # Clusters de casi duplicados (near_duplicates.py), se calculan al pedir dedupe
+        self.row_ids = df.index.to_numpy() + 1  # Crecientes: son las claves de la paginación por cursor
+        self.filtered = OrderedDict()  # clave de filtros -> (posiciones, row_ids) de las filas que los cumplen
+        self.keyword_groups = None  # (código por fila, dicts de palabras clave distintos), para filtrar por término
+        self.nbytes = self._estimate_bytes()
+        self.cache = None  # DatasetCache que lo contiene: las vistas añadidas cuentan para su límite
+        self._locks = {}  # vista -> Lock: cada vista perezosa se calcula una sola vez
+        self._locks_guard = threading.Lock()
+
+    def _view_lock(self, name):
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _resize(self, delta):
+        if self.cache is not None:
+            self.cache.resize(self, delta)
+        else:
+            self.nbytes += delta
+
+    def lazy(self, name, compute):
+        """
+        Vista perezosa (rollup, duplicates, keyword_groups): compute() se llama una sola vez
+        aunque varias peticiones la pidan a la vez, y su tamaño se suma al del dataset.
+        """
+        value = getattr(self, name)
+        if value is None:
+            with self._view_lock(name):
+                value = getattr(self, name)
+                if value is None:
+                    value = compute()
+                    setattr(self, name, value)
+                    self._resize(view_bytes(value))
+        return value
+
+    def filter_positions(self, key, compute):
+        """
+        (posiciones, row_ids) de las filas que cumplen unos filtros. compute() devuelve la
+        máscara booleana y sólo se llama la primera vez: las páginas siguientes de la
+        misma vista filtrada no vuelven a evaluar los filtros.
+        """
+        entry = self.filtered.get(key)
+        if entry is not None:
+            return entry
+
+        lock = self._view_lock(('filtered', key))
+        with lock:
+            entry = self.filtered.get(key)
+            if entry is None:
+                positions = np.flatnonzero(compute())
+                entry = (positions, self.row_ids[positions])
+                delta = view_bytes(entry)
+                with self._locks_guard:
+                    self.filtered[key] = entry
+                    while len(self.filtered) > FILTERED_VIEWS:
+                        _, evicted = self.filtered.popitem(last=False)
+                        delta -= view_bytes(evicted)
+                self._resize(delta)
+        with self._locks_guard:
+            if self._locks.get(('filtered', key)) is lock:
+                del self._locks[('filtered', key)]
+        return entry
+
+    def keyword_codes(self):
+        """
+        Agrupa las filas por su dict de palabras clave (los dicts se comparten entre filas
+        con los mismos términos). Devuelve (código por fila, dicts distintos): un filtro por
+        término evalúa cada dict una vez y expande el resultado con los códigos.
+        """
+        def compute():
+            keywords = self.categories['keywords_found'].to_numpy(dtype=object)
+            ids = np.fromiter(map(id, keywords), dtype=np.int64, count=len(keywords))
+            _, first, codes = np.unique(ids, return_index=True, return_inverse=True)
+            return codes.reshape(-1), keywords[first].tolist()
+        return self.lazy('keyword_groups', compute)
+
+    def _estimate_bytes(self):
+        frame_bytes = int(self.df.memory_usage(deep=True).sum())
+        # Máscaras + un puntero por fila (los dicts de palabras clave se comparten entre filas)
+        category_bytes = int(self.categories.memory_usage(deep=False).sum())
+        return frame_bytes + category_bytes
+
+
+class DatasetCache:
+    """LRU con límite de entradas y de memoria (bytes estimados)."""
+
+    def __init__(self, max_entries=16, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+                old.cache = None
+
+            # Un dataset más grande que todo el límite no se guarda
+            if entry.nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            entry.cache = self
+            self._total_bytes += entry.nbytes
+            self._evict()
+
+    def resize(self, entry, delta):
+        """Suma al dataset (y al total si sigue en la caché) el tamaño de una vista añadida o quitada."""
+        with self._lock:
+            entry.nbytes += delta
+            if entry.cache is self:
+                self._total_bytes += delta
+                self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.nbytes
+            evicted.cache = None
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                entry.cache = None
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,166 @@
+"""
+Diccionarios de palabras clave versionados y recargables en caliente.
+
+Los dos diccionarios viven en archivos JSON ({idioma: {categoria: [terminos]}}):
+
+    <INSIGHT_DICTIONARY_DIR>/resumido.json   (type=True)
+    <INSIGHT_DICTIONARY_DIR>/completo.json   (type=False)
+
+La versión es un hash del contenido de ambos archivos. Cada versión se compila
+(términos normalizados + autómata de matcher.py) UNA sola vez; una recarga
+compila la nueva fuera del camino de las peticiones y cambia la referencia
+actual de golpe: las peticiones en curso terminan con la versión que tomaron.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from matcher import build_matchers
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionaries")
+DICTIONARY_FILES = {True: "resumido.json", False: "completo.json"}
+COMPILED_VERSIONS = 4  # Versiones compiladas que se conservan (volver atrás no recompila)
+
+
+class DictionaryError(ValueError):
+    """Archivo de diccionario ilegible o con un formato inválido."""
+
+
+def validate_dictionary(name, dictionary):
+    if not isinstance(dictionary, dict) or not dictionary:
+        raise DictionaryError(f"{name}: se esperaba {{idioma: {{categoria: [terminos]}}}}")
+    for language, categories in dictionary.items():
+        if not isinstance(categories, dict):
+            raise DictionaryError(f"{name}: '{language}' debe ser {{categoria: [terminos]}}")
+        for category, terms in categories.items():
+            if not isinstance(terms, list) or not all(isinstance(t, str) and t.strip() for t in terms):
+                raise DictionaryError(f"{name}: '{language}.{category}' debe ser una lista de términos")
+
+
+class DictionarySet:
+    """Una versión compilada de los dos diccionarios."""
+
+    def __init__(self, version, dictionaries, normalizer):
+        self.version = version
+        self.dictionaries = dictionaries  # {type: {idioma: {categoria: [terminos]}}}
+        self.matchers = {type: build_matchers(d, normalizer) for type, d in dictionaries.items()}
+        for matchers in self.matchers.values():
+            for matcher in matchers.values():
+                matcher.version = version  # viaja con el matcher (claves de caché, workers)
+        self.loaded_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    @property
+    def languages(self):
+        return sorted(set().union(*(d.keys() for d in self.dictionaries.values())))
+
+    def get_matcher(self, language, type):
+        """Motor del idioma (o inglés por defecto) para el diccionario elegido."""
+        matchers = self.matchers[bool(type)]
+        return matchers.get(language, matchers.get('en'))
+
+
+class DictionaryRegistry:
+    """
+    Versión actual de los diccionarios. current() sólo lee una referencia ya compilada.
+    Con poll_seconds > 0, start() lanza un hilo que comprueba cada intervalo si los
+    archivos cambiaron y recarga; reload() fuerza la recarga (endpoint).
+    """
+
+    def __init__(self, directory, normalizer, poll_seconds=0):
+        self.directory = directory
+        self.normalizer = normalizer
+        self.poll_seconds = poll_seconds
+        self._compiled = OrderedDict()  # versión -> DictionarySet
+        self._lock = threading.Lock()  # sólo entre recargas, nunca para leer
+        self._stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self._current = self._load()
+
+    def _paths(self):
+        return {type: os.path.join(self.directory, name) for type, name in DICTIONARY_FILES.items()}
+
+    def _files_stamp(self):
+        return tuple(os.stat(path).st_mtime_ns for path in self._paths().values())
+
+    def _load(self):
+        """Lee los archivos y devuelve su versión compilada (reutilizada si ya existía)."""
+        stamp = self._files_stamp()
+        raw, digest = {}, hashlib.sha256()
+        for type, path in self._paths().items():
+            with open(path, 'rb') as fh:
+                raw[type] = fh.read()
+            digest.update(raw[type] + b'\x00')
+        version = digest.hexdigest()[:12]
+
+        dictionary_set = self._compiled.get(version)
+        if dictionary_set is None:
+            dictionaries = {}
+            for type, content in raw.items():
+                try:
+                    dictionaries[type] = json.loads(content.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise DictionaryError(f"{DICTIONARY_FILES[type]}: {e}") from e
+                validate_dictionary(DICTIONARY_FILES[type], dictionaries[type])
+            dictionary_set = self._compiled[version] = DictionarySet(version, dictionaries, self.normalizer)
+            while len(self._compiled) > COMPILED_VERSIONS:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(version)
+
+        self._stamp = stamp
+        return dictionary_set
+
+    def reload(self):
+        """Compila la versión de los archivos y la activa. Si fallan, sigue la anterior."""
+        with self._lock:
+            previous = self._current
+            try:
+                self._current = self._load()
+                self.last_error = None
+            except (OSError, DictionaryError) as e:
+                self.last_error = str(e)
+                raise
+            return previous.version, self._current.version
+
+    def poll(self):
+        """Recarga si los archivos cambiaron desde la última carga; si fallan, sigue la anterior."""
+        with self._lock:
+            try:
+                stamp = self._files_stamp()
+                if stamp != self._stamp:
+                    self._stamp = stamp  # un archivo inválido se avisa una vez, no en cada sondeo
+                    self._current = self._load()
+                    self.last_error = None
+            except (OSError, DictionaryError) as e:
+                self.last_error = str(e)
+                print(f"⚠️ Diccionarios no recargados: {e}")
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll()
+
+    def start(self):
+        """Arranca el sondeo en segundo plano (nada si poll_seconds <= 0 o ya está en marcha)."""
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="dictionary-poll", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def current(self):
+        return self._current
+
+    def get(self, version):
+        """Versión compilada concreta si aún se conserva (ej. la de un índice ya construido), o None."""
+        return self._compiled.get(version)
@@ -0,0 +1,126 @@
+"""
+Ejecución de las etapas pesadas (parseo, normalización, categorización) fuera
+del event loop, en un pool de procesos configurable.
+
+Variables de entorno:
+    INSIGHT_WORKERS          procesos del pool (0 = en un hilo, sin procesos)
+    INSIGHT_MAX_CONCURRENCY  análisis simultáneos
+    INSIGHT_QUEUE_DEPTH      análisis en espera antes de responder 503
+    INSIGHT_SHARD_ROWS       filas por fragmento al repartir un frame grande
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pandas as pd
+
+
+class QueueFullError(RuntimeError):
+    """Demasiados análisis esperando turno."""
+
+
+def shard_frame(df, shard_rows):
+    """Divide un frame en fragmentos contiguos de como mucho shard_rows filas."""
+    if shard_rows <= 0 or len(df) <= shard_rows:
+        return [df]
+    return [df.iloc[start:start + shard_rows] for start in range(0, len(df), shard_rows)]
+
+
+class AnalysisExecutor:
+    """Pool de procesos + límite de concurrencia y cola para el API."""
+
+    def __init__(self, workers, max_concurrency, queue_depth, shard_rows):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.queue_depth = queue_depth
+        self.shard_rows = shard_rows
+        self._pool = None
+        self._semaphore = None
+        self._waiting = 0
+        self._running = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.getenv("INSIGHT_WORKERS", str(os.cpu_count() or 1))),
+            max_concurrency=int(os.getenv("INSIGHT_MAX_CONCURRENCY", "4")),
+            queue_depth=int(os.getenv("INSIGHT_QUEUE_DEPTH", "16")),
+            shard_rows=int(os.getenv("INSIGHT_SHARD_ROWS", "20000")),
+        )
+
+    @property
+    def pool(self):
+        # Creación perezosa: importar el módulo no arranca procesos
+        if self._pool is None:
+            if self.workers > 0:
+                # 'spawn' evita heredar hilos del servidor (fork + hilos no es seguro)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=1)
+        return self._pool
+
+    @asynccontextmanager
+    async def slot(self):
+        """Turno de análisis: espera si hay max_concurrency en curso, 503 si la cola está llena."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self._semaphore.locked() and self._waiting >= self.queue_depth:
+            raise QueueFullError("Cola de análisis llena")
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    async def run(self, fn, *args):
+        """Ejecuta fn(*args) en el pool sin bloquear el event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def run_sharded(self, fn, df, *args):
+        """
+        Reparte df en fragmentos, ejecuta fn(fragmento, *args) en paralelo y
+        devuelve los resultados en el orden original de los fragmentos.
+        """
+        shards = shard_frame(df, self.shard_rows)
+        return await asyncio.gather(*(self.run(fn, shard, *args) for shard in shards))
+
+    def call(self, fn, *args):
+        """Versión bloqueante para código que ya corre fuera del event loop (streaming)."""
+        return self.pool.submit(fn, *args).result()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "shard_rows": self.shard_rows,
+            "running": self._running,
+            "waiting": self._waiting,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def concat_results(results):
+    """Une los (df, categorias) de cada fragmento manteniendo el orden."""
+    frames = [df for df, _ in results]
+    categories = [cats for _, cats in results]
+    if len(results) == 1:
+        return frames[0], categories[0]
+    return pd.concat(frames), pd.concat(categories)
@@ -1,12 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+import numpy as np
 import pandas as pd
-import io
+import datetime
+import json
 import re
 import time
 from collections import Counter
+from contextlib import AsyncExitStack
 import math
-import unicodedata  # <--- Librería necesaria para la limpieza universal
+import os
+from typing import List, Optional
+from normalizer import normalize_series, normalize_text  # <--- Limpieza universal (versión rápida)
+from dictionaries import DICTIONARY_DIR, DictionaryError, DictionaryRegistry
+from dataset_cache import CachedDataset, DatasetCache, dataset_key
+from csv_loader import CHUNK_ROWS, CSVLoadError, iter_csv_chunks, load_csv
+from executor import AnalysisExecutor, QueueFullError, concat_results
+from metrics import MetricsRegistry, RequestTimer, profiled
+from review_store import ReviewStore, to_store_frame
+from near_duplicates import duplicate_summary, find_near_duplicates
+from rollups import GRANULARITIES, StoreRollups, bucket_rollup, daily_rollup
+from tellapart import SENTIMENT_ENGINES
+from analysis_index import DICTIONARY_KEYS, INDEX_META, SENTIMENT_FILTERS, VALID_INDEX_ID, AnalysisIndex, mask_column
 
 app = FastAPI(
     title="API de Análisis Multilingüe",
@@ -21,262 +38,1022 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- DICCIONARIO MAESTRO (Versión Completa) ---
-MASTER_DICTIONARY2 = {
-    'es': {
-        'delays': ['retraso', 'tarde', 'demora', 'espera', 'lento', 'horario', 'cerrado', 'detenido', 'cancelacion'],
-        'hygiene': ['sucio', 'suciedad', 'limpieza', 'olor', 'pegajoso', 'pegajosa', 'papelera', 'resbaladizo', 'resbaladiza'],
-        'comfort': ['aire', 'calor', 'frio', 'asiento', 'seguro', 'calefaccion', 'equipaje', 'altura'],
-        'infrastructure': ['puerta', 'averia', 'falla', 'roto', 'frenos', 'ruido', 'vias', 'mantenimiento', 'iluminacion', 'daño', 'guia', 'bicicleta', 'ascensor', 'enchufe', 'anuncio', 'rampa', 'accesibilidad', 'emergencia', 'señal', 'movilidad'],
-        'service': ['grosero', 'personal', 'taquilla', 'tarjeta', 'cobro', 'informa', 'reserva', 'estres', 'tono', 'confusion', 'formulario', 'billete', 'duda', 'compensacion', 'megafonia', 'app'],
-        'user': ['perdido', 'vandalismo', 'agresiva', 'accident', 'sospechoso', 'disturbio']
-    },
-    'en': {
-        'delays': ['delay', 'late', 'wait', 'slow', 'schedule', 'closed', 'stopped', 'stuck', 'cancelled', 'cancellation'],
-        'hygiene': ['dirty', 'filth', 'cleaning', 'smell', 'odor', 'sticky', 'bin', 'trash', 'slippery'],
-        'comfort': ['air', 'heat', 'hot', 'cold', 'seat', 'safe', 'safety', 'heating', 'luggage', 'baggage', 'height', 'headroom'],
-        'infrastructure': ['door', 'breakdown', 'failure', 'fault', 'broken', 'brakes', 'noise', 'loud', 'track', 'rails', 'maintenance', 'lighting', 'lights', 'damage', 'guide', 'bicycle', 'bike', 'elevator', 'lift', 'plug', 'socket', 'outlet', 'announcement', 'ramp', 'accessibility', 'emergency', 'signal', 'sign', 'mobility'],
-        'service': ['rude', 'staff', 'personnel', 'counter', 'office', 'card', 'charge', 'payment', 'info', 'information', 'booking', 'reservation', 'stress', 'tone', 'confusion', 'form', 'ticket', 'doubt', 'question', 'compensation', 'refund', 'loudspeaker', 'pa system', 'app'],
-        'user': ['lost', 'vandalism', 'aggressive', 'accident', 'suspicious', 'disturbance']
-    },
-    'de': {
-        'delays': ['verspätung', 'spät', 'warten', 'verzögerung', 'langsam', 'fahrplan', 'geschlossen', 'gestoppt', 'angehalten', 'ausfall', 'stornierung'],
-        'hygiene': ['schmutzig', 'dreckig', 'schmutz', 'reinigung', 'sauberkeit', 'geruch', 'stinken', 'klebrig', 'mülleimer', 'abfall', 'rutschig','mull'],
-        'comfort': ['luft', 'klimaanlage', 'hitze', 'warm', 'kalt', 'kälte', 'sitz', 'sitzplatz', 'sicher', 'sicherheit', 'heizung', 'gepäck', 'koffer', 'höhe'],
-        'infrastructure': ['tür', 'panne', 'defekt', 'fehler', 'störung', 'kaputt', 'bremse', 'lärm', 'laut', 'gleis', 'schiene', 'wartung', 'beleuchtung', 'licht', 'schaden', 'beschädigt', 'führer', 'fahrrad', 'aufzug', 'fahrstuhl', 'steckdose', 'ansage', 'durchsage', 'rampe', 'barrierefreiheit', 'notfall', 'signal', 'schild', 'mobilität','anzeigetafeln','lift','aüsfalle','blockiert'],
-        'service': ['unfreundlich', 'grob', 'personal', 'mitarbeiter', 'schalter', 'karte', 'gebühr', 'zahlung', 'info', 'auskunft', 'reservierung', 'stress', 'ton', 'verwirrung', 'formular', 'fahrkarte', 'ticket', 'zweifel', 'frage', 'entschädigung', 'erstattung', 'lautsprecher', 'app','unklarheiten','personen','buchung','tarifzonen','maulkorbregel'],
-        'user': ['verloren', 'vandalismus', 'aggressiv', 'unfall', 'verdächtig', 'störung', 'unruhe','verlust','randalierende']
-    }
-}
-
-# --- DICCIONARIO RESUMIDO ---
-MASTER_DICTIONARY = {
-    'es': {
-        'punctuality': ['punt', 'demora', 'espera', 'horario'],
-        'hygiene': ['limpieza','limpio'],
-        'comfort': ['aire', 'calor', 'frio', 'asiento', 'seguro', 'calefaccion','equipaje','altura'],
-        'infrastructure': ['puerta', 'falla', 'iluminacion', 'guia', 'bicicleta', 'ascensor','enchufe','anuncio','rampa','accesibilidad','emergencia','seña','movilidad'],
-        'service': ['buen', 'personal', 'taquilla', 'tarjeta', 'cobro', 'informa', 'reserva', 'amable', 'formulario', 'duda', 'compensacion','app'],
-    },
-  "en": {
-    "punctuality": ["punctuality", "delay", "waiting", "schedule"],
-    "hygiene": ["cleanliness", "clean"],
-    "comfort": ["air", "heat", "cold", "seat", "safe", "heating", "luggage", "height"],
-    "infrastructure": ["door", "failure", "lighting", "guide", "bicycle", "elevator", "outlet", "announcement", "ramp", "accessibility", "emergency", "signal", "mobility"],
-    "service": ["good", "staff", "ticket office", "card", "charge", "inform", "reservation", "friendly", "form", "doubt", "compensation", "app", "personal"]
-  },
-  "de": {
-    "punctuality": ["punktlichkeit", "verspatung", "warten", "fahrplan"],
-    "hygiene": ["sauberkeit", "sauber"],
-    "comfort": ["luft", "hitze", "kaelte", "sitz", "sicher", "heizung", "gepack", "hoehe" ],
-    "infrastructure": ["tuer", "fehler", "beleuchtung", "leitung", "fahrrad", "aufzug", "steckdose", "ansage", "rampe", "barrierefreiheit", "notfall", "signal", "mobilitat"],
-    "service": ["gut", "personal", "schalter", "karte", "gebuhr", "information", "reservierung", "freundlich", "formular", "zweifel", "entschadigung", "app","lob"]
-  },
-  "fr": {
-    "punctuality": ["ponctualite", "retard", "attente", "horaire"],
-    "hygiene": ["hygiene", "propre"],
-    "comfort": ["air", "chaleur", "froid", "siege", "sur", "chauffage", "bagage", "hauteur"],
-    "infrastructure": ["porte", "panne", "eclairage", "guide", "velo", "ascenseur", "prise", "annonce", "rampe", "accessibilite", "urgence", "signal", "mobilite"],
-    "service": ["bon", "personnel", "guichet", "carte", "frais", "information", "reservation","aimable", "formulaire", "doute", "compensation", "app"]
-  }
-}
-
-# --- NUEVA FUNCIÓN UNIVERSAL DE LIMPIEZA ---
-def normalize_text(text):
-    """
-    Elimina acentos y diacríticos de cualquier idioma (fr, de, es, pt)
-    usando normalización Unicode, pero preserva la ñ/Ñ.
-    """
-    if not isinstance(text, str): return ""
-    
-    # 1. Proteger la ñ/Ñ reemplazándolas por marcadores temporales
-    text = text.replace('ñ', '\001').replace('Ñ', '\002')
-    
-    # 2. Normalizar a NFD (descompone caracteres, ej: ü -> u + ¨)
-    text = unicodedata.normalize('NFD', text)
-    
-    # 3. Filtrar caracteres que sean marcas de no espaciado (Mn) - Elimina los acentos
-    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-    
-    # 4. Restaurar ñ/Ñ y convertir a minúsculas
-    return text.replace('\001', 'ñ').replace('\002', 'ñ').lower()
+# --- DICCIONARIOS (archivos versionados en dictionaries/, compilados una vez por versión) ---
+DICTIONARIES = DictionaryRegistry(
+    os.getenv("INSIGHT_DICTIONARY_DIR", DICTIONARY_DIR), normalize_text,
+    poll_seconds=float(os.getenv("INSIGHT_DICTIONARY_POLL", "5")),
+)
+
+@app.on_event("startup")
+def start_dictionary_polling():
+    # Sondeo y compilación en un hilo propio: las peticiones sólo leen la versión actual
+    DICTIONARIES.start()
+
+@app.on_event("shutdown")
+def stop_dictionary_polling():
+    DICTIONARIES.stop()
+
+def get_matcher(language, type):
+    """Devuelve el motor del idioma (o inglés por defecto) para el diccionario elegido, en su versión actual."""
+    return DICTIONARIES.current().get_matcher(language, type)
+
+# --- CACHÉ DE DATASETS (evita re-parsear el CSV en cada página) ---
+DATASET_CACHE = DatasetCache(
+    max_entries=int(os.getenv("INSIGHT_CACHE_MAX_ENTRIES", "16")),
+    max_bytes=int(os.getenv("INSIGHT_CACHE_MAX_MB", "512")) * 1024 * 1024,
+)
+
+# --- POOL DE PROCESOS (las etapas pesadas no bloquean el event loop) ---
+EXECUTOR = AnalysisExecutor.from_env()
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    EXECUTOR.shutdown()
+
+# --- ALMACÉN DE RESEÑAS (Parquet compartido con el scraper y tellapart.py) ---
+REVIEW_STORE = ReviewStore(os.getenv("INSIGHT_STORE_DIR", "review_store"))
+STORE_ANALYSIS_COLUMNS = {'subj': 'Subject', 'msg': 'Review', 'date': 'Date'}
+POSSIBLE_RATING_COLS = ["Calificación", "Rating", "Bewertung", "Puntuación"]
+# Rollups diarios del almacén para /almacen/tendencias (se actualizan con los archivos nuevos)
+STORE_ROLLUPS = StoreRollups(REVIEW_STORE, os.getenv("INSIGHT_ROLLUP_DIR", "rollups"))
+
+# --- ÍNDICES PRECALCULADOS (construidos con analysis_index.py, sólo lectura) ---
+INDEX_DIR = os.getenv("INSIGHT_INDEX_DIR", "indices")
+LOADED_INDEXES = {}  # index_id -> AnalysisIndex (se recarga si el índice se reconstruye)
+
+# --- MÉTRICAS (expuestas en /metrics, formato Prometheus) ---
+METRICS = MetricsRegistry()
+REQUESTS_TOTAL = METRICS.counter("insight_requests_total", "Peticiones HTTP por ruta y código")
+REQUEST_SECONDS = METRICS.histogram("insight_request_duration_seconds", "Latencia de las peticiones HTTP por ruta")
+STAGE_SECONDS = METRICS.histogram("insight_stage_duration_seconds", "Duración de cada etapa del análisis")
+ROWS_PROCESSED = METRICS.counter("insight_rows_processed_total", "Filas parseadas y categorizadas")
+UPLOAD_BYTES = METRICS.counter("insight_upload_bytes_total", "Bytes de archivos subidos")
+CACHE_REQUESTS = METRICS.counter("insight_dataset_cache_requests_total", "Consultas a la caché de datasets (hit/miss)")
+METRICS.gauge("insight_dataset_cache_entries", "Datasets en caché", lambda: DATASET_CACHE.stats()["entries"])
+METRICS.gauge("insight_dataset_cache_bytes", "Memoria estimada de la caché", lambda: DATASET_CACHE.stats()["bytes"])
+METRICS.gauge("insight_executor_running", "Análisis en curso", lambda: EXECUTOR.stats()["running"])
+METRICS.gauge("insight_executor_waiting", "Análisis esperando turno", lambda: EXECUTOR.stats()["waiting"])
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # Plantilla de la ruta (ej: /analizar/{dataset_id}) para no crear una serie por dataset
+    route = request.scope.get("route")
+    path = route.path if route is not None else "otros"
+    REQUESTS_TOTAL.inc(path=path, method=request.method, status=response.status_code)
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, path=path)
+    return response
+
+def record_analysis(timer, rows, upload_bytes, cached):
+    """Vuelca los tiempos por etapa y contadores de una petición a las métricas globales."""
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    ROWS_PROCESSED.inc(rows)
+    UPLOAD_BYTES.inc(upload_bytes)
+    CACHE_REQUESTS.inc(result="hit" if cached else "miss")
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def root():
     return {"status": "online", "version": "v13.2_universal_cleaner"}
 
-@app.post("/analizar/")
-async def analyze_complaints_endpoint(
-    file: UploadFile = File(...), 
-    language: str = Form("es"),
-    col_subj: str = Form("Asunto"), 
-    col_msg: str = Form("Contenido"), 
-    col_date: str = Form("Fecha"),
-    type: bool = Form("Tipo"),
-    page: int = Form(1),
-    limit: int = Form(50)
-):
-    t_start = time.time()
-    
-    # 1. Validación Idioma
-    if language not in MASTER_DICTIONARY and language not in MASTER_DICTIONARY2:
+@app.get("/diccionarios/")
+def dictionaries_endpoint():
+    """Versión activa de los diccionarios (hash del contenido de los archivos)."""
+    current = DICTIONARIES.current()
+    return {
+        "status": "success",
+        "version": current.version,
+        "loaded_at": current.loaded_at,
+        "languages": current.languages,
+        "dictionaries": {DICTIONARY_KEYS[type]: {lang: {cat: len(terms) for cat, terms in cats.items()}
+                                                 for lang, cats in d.items()}
+                         for type, d in current.dictionaries.items()},
+        "last_error": DICTIONARIES.last_error,
+    }
+
+@app.post("/diccionarios/recargar")
+def reload_dictionaries_endpoint():
+    """
+    Relee los archivos de diccionario y activa la nueva versión sin reiniciar.
+    Las peticiones en curso terminan con la versión que ya tenían; si los
+    archivos no son válidos se mantiene la versión actual.
+    """
+    try:
+        previous, version = DICTIONARIES.reload()
+    except (OSError, DictionaryError) as e:
+        raise HTTPException(status_code=400, detail=f"Diccionarios no recargados: {e}")
+    return {"status": "success", "previous_version": previous, "version": version, "changed": previous != version}
+
+def validate_language(language):
+    """1. Validación Idioma"""
+    if language not in DICTIONARIES.current().languages:
         if language != "es":
              raise HTTPException(status_code=400, detail="Idioma no soportado.")
-    
-    # 2. Lectura CSV (Lógica de Separador Inteligente)
-    contents = await file.read()
-    df = None
-    last_error = None
 
-    # Intentos de lectura con diferentes separadores
-    separators = [';', ',', '\t']
-    
-    # Primero intentamos UTF-8
-    for sep in separators:
-        try:
-            temp_df = pd.read_csv(io.BytesIO(contents), sep=sep, encoding='utf-8', dtype=str)
-            if len(temp_df.columns) > 1:
-                df = temp_df
-                break
-        except Exception as e:
-            last_error = e
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}$')
+
+def validate_dates(date_from=None, date_to=None):
+    """Filtros de fecha: días reales 'YYYY-MM-DD' (se comparan como texto con las fechas normalizadas)."""
+    for name, value in (('date_from', date_from), ('date_to', date_to)):
+        if not value:
             continue
-    
-    # Si falló UTF-8, intentamos Latin-1
-    if df is None:
-        for sep in separators:
-            try:
-                temp_df = pd.read_csv(io.BytesIO(contents), sep=sep, encoding='latin-1', dtype=str)
-                if len(temp_df.columns) > 1:
-                    df = temp_df
-                    break
-            except Exception as e:
-                last_error = e
-                continue
-
-    if df is None:
-         try:
-             df = pd.read_csv(io.BytesIO(contents), sep=None, engine='python', encoding='utf-8', dtype=str)
-         except:
-             raise HTTPException(status_code=400, detail="No se pudo leer el archivo CSV. Verifica el formato y separadores.")
+        try:
+            valid = bool(ISO_DATE.match(value)) and bool(datetime.date.fromisoformat(value))
+        except ValueError:
+            valid = False
+        if not valid:
+            raise HTTPException(status_code=400, detail=f"{name} debe ser una fecha 'YYYY-MM-DD'.")
 
+def read_uploaded_csv(contents):
+    """Lectura CSV: detección de dialecto sobre un prefijo y un único parseo."""
+    try:
+        return load_csv(contents)
+    except CSVLoadError:
+        raise HTTPException(status_code=400, detail="No se pudo leer el archivo CSV. Verifica el formato y separadores.")
+
+def resolve_columns(columns, col_subj, col_msg, col_date):
+    """Auto-detección y validación de columnas. Devuelve {'subj', 'msg', 'date' (o None)}."""
     # --- AUTO-DETECCIÓN DE COLUMNAS ---
     possible_msg_cols = ["Contenido", "Content", "Inhalt", "Message", "Comentario", "Body", "Description"]
     possible_subj_cols = ["Asunto", "Subject", "Betreff", "Title", "Titulo", "Topic"]
     possible_date_cols = ["Fecha", "Date", "Zeitstempel", "Time", "Timestamp", "Datum"]
 
-    if col_msg not in df.columns:
+    if col_msg not in columns:
         for candidate in possible_msg_cols:
-            if candidate in df.columns:
+            if candidate in columns:
                 col_msg = candidate
                 break
     
-    if col_subj not in df.columns:
+    if col_subj not in columns:
         for candidate in possible_subj_cols:
-            if candidate in df.columns:
+            if candidate in columns:
                 col_subj = candidate
                 break
 
-    if col_date not in df.columns:
+    if col_date not in columns:
         for candidate in possible_date_cols:
-            if candidate in df.columns:
+            if candidate in columns:
                 col_date = candidate
                 break
 
     # 3. Validación Final de Columnas
     required_cols = [col_msg, col_subj]
-    if not all(col in df.columns for col in required_cols):
-        missing = [c for c in required_cols if c not in df.columns]
-        raise HTTPException(status_code=400, detail=f"Faltan columnas. Columnas encontradas: {list(df.columns)}. Faltan: {missing}")
-        
-    has_date = col_date in df.columns
+    if not all(col in columns for col in required_cols):
+        missing = [c for c in required_cols if c not in columns]
+        raise HTTPException(status_code=400, detail=f"Faltan columnas. Columnas encontradas: {list(columns)}. Faltan: {missing}")
+
+    return {'subj': col_subj, 'msg': col_msg, 'date': col_date if col_date in columns else None}
+
+def resolve_matcher(language, type):
+    """5. Selección del Diccionario (motor ya compilado)."""
+    matcher = get_matcher(language, type)
+
+    if matcher is None:
+         raise HTTPException(status_code=400, detail="No hay palabras clave para este idioma/tipo.")
+    return matcher
+
+def categorize_frame(df, columns, matcher):
+    """4-6. Limpieza, fecha y categorización de un frame (completo o un chunk)."""
+    col_subj, col_msg, col_date = columns['subj'], columns['msg'], columns['date']
+
+    timer = RequestTimer()
 
     # 4. Limpieza y Fecha
-    df = df.dropna(subset=[col_msg]).fillna("")
-    if has_date:
-        df[col_date] = pd.to_datetime(df[col_date], errors='coerce').dt.strftime('%Y-%m-%d')
-        df[col_date] = df[col_date].fillna("Fecha inválida")
+    with timer.stage('clean'):
+        df = df.dropna(subset=[col_msg]).fillna("")
+        if col_date:
+            df[col_date] = pd.to_datetime(df[col_date], errors='coerce').dt.strftime('%Y-%m-%d')
+            df[col_date] = df[col_date].fillna("Fecha inválida")
     
     # --- PREPARACIÓN DE BÚSQUEDA ---
-    # Aplicamos la función universal (normalize_text) a toda la columna
-    search_series = df[col_subj].astype(str).apply(normalize_text)
+    # Aplicamos la función universal a toda la columna de una vez (cada valor distinto se limpia una vez)
+    with timer.stage('normalize'):
+        search_series = normalize_series(df[col_subj].astype(str))
     
-    # 5. Selección del Diccionario
-    if type:
-        keywords = MASTER_DICTIONARY.get(language, MASTER_DICTIONARY.get('en'))
+    # 6. Análisis Global (una sola pasada por fila, resultado columnar para todo el frame)
+    with timer.stage('match'):
+        categories = matcher.categorize(search_series)
+
+    # Los tiempos viajan con el resultado (esta función corre en los workers del pool)
+    categories.attrs['timings'] = timer.stages
+    return df, categories
+
+def add_worker_timings(timer, categories):
+    """Suma al timer de la petición los tiempos medidos dentro de categorize_frame."""
+    for stage, seconds in categories.attrs.get('timings', {}).items():
+        timer.add(stage, seconds)
+
+def summarize_categories(category_counts, uncategorized):
+    """Estadísticas ordenadas por menciones, con 'sin_categoria' al final."""
+    sorted_summary = [{"category": c, "total_mentions": n} for c, n in category_counts.most_common()]
+    if uncategorized > 0:
+        sorted_summary.append({"category": "sin_categoria", "total_mentions": int(uncategorized)})
+    return sorted_summary
+
+def build_dataset(df, categories, matcher, columns, language, type, parse_info):
+    """Estadísticas globales a partir de las máscaras y empaquetado para la caché."""
+    category_counts = Counter(matcher.category_counts(categories['category_mask']))
+    uncategorized = int((categories['category_mask'] == 0).sum())
+    sorted_summary = summarize_categories(category_counts, uncategorized)
+
+    parse_info = {k: v for k, v in parse_info.items() if k != 'columns'}
+    return CachedDataset(df, categories, matcher, sorted_summary, columns, language, type, parse_info)
+
+def analyze_dataset(contents, language, col_subj, col_msg, col_date, type, timer=None, matcher=None):
+    """Parseo, limpieza y categorización completa de un archivo subido (en el proceso actual)."""
+    timer = timer or RequestTimer()
+    matcher = matcher or resolve_matcher(language, type)
+
+    with timer.stage('parse'):
+        df, parse_info = read_uploaded_csv(contents)
+    columns = resolve_columns(df.columns, col_subj, col_msg, col_date)
+
+    df, categories = categorize_frame(df, columns, matcher)
+    add_worker_timings(timer, categories)
+
+    with timer.stage('statistics'):
+        return build_dataset(df, categories, matcher, columns, language, type, parse_info)
+
+async def analyze_dataset_async(contents, language, col_subj, col_msg, col_date, type, timer=None, matcher=None):
+    """
+    Igual que analyze_dataset, pero el parseo y la categorización corren en el pool
+    de procesos; los frames grandes se reparten en fragmentos entre los workers.
+    """
+    timer = timer or RequestTimer()
+    matcher = matcher or resolve_matcher(language, type)
+
+    try:
+        with timer.stage('parse'):
+            df, parse_info = await EXECUTOR.run(load_csv, contents)
+    except CSVLoadError:
+        raise HTTPException(status_code=400, detail="No se pudo leer el archivo CSV. Verifica el formato y separadores.")
+
+    columns = resolve_columns(df.columns, col_subj, col_msg, col_date)
+
+    # 'categorize' es el tiempo real; clean/normalize/match suman el tiempo de todos los workers
+    with timer.stage('categorize'):
+        results = await EXECUTOR.run_sharded(categorize_frame, df, columns, matcher)
+    for _, shard_categories in results:
+        add_worker_timings(timer, shard_categories)
+
+    with timer.stage('statistics'):
+        df, categories = concat_results(results)
+        return build_dataset(df, categories, matcher, columns, language, type, parse_info)
+
+def serialize_frame(df, categories, matcher, columns, duplicates=None):
+    """
+    Serializa filas directamente desde las columnas precalculadas (sin iterrows).
+    duplicates: clusters de casi duplicados de esas filas (dataset_duplicates); añade
+    'cluster' (row_id de la primera fila del cluster) e 'is_duplicate' a cada fila.
+    """
+    col_subj, col_msg, col_date = columns['subj'], columns['msg'], columns['date']
+
+    names = {mask: matcher.category_names(mask) or ["sin_categoria"]
+             for mask in categories['category_mask'].unique()}
+
+    rows = pd.DataFrame({
+        'row_id': df.index + 1,
+        'date': df[col_date] if col_date else "N/A",
+        'subject': df[col_subj].astype(str),
+        'preview': df[col_msg].astype(str),
+        'detected_categories': categories['category_mask'].map(names),
+        'keywords_found': categories['keywords_found'],
+    }, index=df.index)
+    if duplicates is not None:
+        rows['cluster'] = duplicates['cluster']
+        rows['is_duplicate'] = duplicates['is_duplicate']
+    return rows.to_dict('records')
+
+def serialize_rows(dataset, start_idx, end_idx, dedupe=False):
+    """Serializa un rango de filas de un dataset en caché (con dedupe, también su cluster)."""
+    duplicates = dataset_duplicates(dataset).iloc[start_idx:end_idx] if dedupe else None
+    return serialize_frame(dataset.df.iloc[start_idx:end_idx], dataset.categories.iloc[start_idx:end_idx],
+                           dataset.matcher, dataset.columns, duplicates)
+
+def active_filters(category=None, keyword=None, date_from=None, date_to=None, rating=None):
+    """Filtros de filas pedidos (sólo los que tienen valor). Las fechas inválidas se rechazan con 400."""
+    validate_dates(date_from, date_to)
+    filters = {'category': category, 'keyword': keyword, 'date_from': date_from,
+               'date_to': date_to, 'rating': rating}
+    return {k: v for k, v in filters.items() if v}
+
+def filter_mask(dataset, filters):
+    """
+    Máscara booleana de las filas que cumplen todos los filtros, evaluada sobre las
+    columnas precalculadas del dataset (máscaras de categoría, palabras clave, fechas).
+    category: lista (basta con una); keyword: término del diccionario; rating: lista.
+    """
+    df, categories, matcher = dataset.df, dataset.categories, dataset.matcher
+    keep = np.ones(len(df), dtype=bool)
+
+    if 'category' in filters:
+        masks = categories['category_mask'].to_numpy()
+        wanted = np.zeros(len(df), dtype=bool)
+        for category in filters['category']:
+            if category == "sin_categoria":
+                wanted |= masks == 0
+            elif category in matcher.category_bits:
+                wanted |= (masks & matcher.category_bits[category]) != 0
+            else:
+                raise HTTPException(status_code=400, detail=f"Categoría desconocida: {category}")
+        keep &= wanted
+
+    if 'keyword' in filters:
+        # Se evalúa cada dict de palabras clave distinto una vez y se expande con los códigos por fila
+        term = normalize_text(filters['keyword'])
+        codes, keyword_sets = dataset.keyword_codes()
+        hits = np.fromiter((any(term in terms for terms in kw.values()) for kw in keyword_sets),
+                           dtype=bool, count=len(keyword_sets))
+        keep &= hits[codes]
+
+    if 'date_from' in filters or 'date_to' in filters:
+        if not dataset.columns['date']:
+            raise HTTPException(status_code=400, detail="El dataset no tiene columna de fecha.")
+        # Fechas 'YYYY-MM-DD' (el orden de texto es el cronológico); 'Fecha inválida' nunca cumple
+        dates = df[dataset.columns['date']].astype(str)
+        keep &= dates.str.match(r'\d{4}-\d{2}-\d{2}$').to_numpy(dtype=bool)
+        dates = dates.to_numpy(dtype=object)
+        if 'date_from' in filters:
+            keep &= dates >= filters['date_from']
+        if 'date_to' in filters:
+            keep &= dates <= filters['date_to']
+
+    if 'rating' in filters:
+        rating_col = next((c for c in POSSIBLE_RATING_COLS if c in df.columns), None)
+        if rating_col is None:
+            raise HTTPException(status_code=400, detail="El dataset no tiene columna de puntuación.")
+        keep &= pd.to_numeric(df[rating_col], errors='coerce').isin(filters['rating']).to_numpy(dtype=bool)
+
+    return keep
+
+def build_page(dataset, page, limit, filters=None, cursor=None, dedupe=False):
+    """
+    7. Paginación sobre un dataset ya analizado.
+    Con filtros, las posiciones que los cumplen se calculan una vez por vista y se
+    memorizan en el dataset. cursor: row_id de la última fila recibida; la página
+    empieza justo después (búsqueda binaria sobre los row_id, que son crecientes),
+    así que una página profunda cuesta lo mismo que la primera.
+    dedupe: cada fila lleva además su cluster de casi duplicados.
+    """
+    if filters:
+        positions, row_ids = dataset.filter_positions(json.dumps(filters, sort_keys=True),
+                                                      lambda: filter_mask(dataset, filters))
     else:
-        keywords = MASTER_DICTIONARY2.get(language, MASTER_DICTIONARY2.get('en'))
+        positions, row_ids = None, dataset.row_ids
 
-    if not keywords:
-         raise HTTPException(status_code=400, detail="No hay palabras clave para este idioma/tipo.")
-    
-    # 6. Análisis Global
-    category_counts = Counter()
-    global_mask = pd.Series([False] * len(df), index=df.index)
-
-    for category, terms in keywords.items():
-        # Limpiamos también los términos del diccionario con la misma función
-        clean_terms = [normalize_text(t) for t in terms]
-        if clean_terms:
-            pattern = '|'.join([re.escape(t) for t in clean_terms])
-            matches = search_series.str.contains(pattern, regex=True)
-            category_counts[category] = int(matches.sum())
-            global_mask = global_mask | matches
-
-    # 7. Paginación
-    total_rows = len(df)
+    total_rows = len(row_ids)
     total_pages = math.ceil(total_rows / limit)
-    start_idx = (page - 1) * limit
+    if cursor is not None:
+        start_idx = int(np.searchsorted(row_ids, cursor, side='right'))
+        page = start_idx // limit + 1
+    else:
+        start_idx = (page - 1) * limit
     end_idx = start_idx + limit
+
+    if positions is None:
+        data = serialize_rows(dataset, start_idx, end_idx, dedupe)
+    else:
+        rows = positions[start_idx:end_idx]
+        duplicates = dataset_duplicates(dataset).iloc[rows] if dedupe else None
+        data = serialize_frame(dataset.df.iloc[rows], dataset.categories.iloc[rows], dataset.matcher, dataset.columns,
+                               duplicates)
+
+    return {
+        "pagination": {
+            "current_page": page,
+            "items_per_page": limit,
+            "total_pages": total_pages,
+            "total_items": total_rows,
+            "next_cursor": int(row_ids[end_idx - 1]) if end_idx < total_rows else None
+        },
+        "data": data,
+    }
+
+def paginate(dataset, page, limit, timer, filters=None, cursor=None, dedupe=False):
+    with timer.stage('paginate'):
+        return build_page(dataset, page, limit, filters, cursor, dedupe)
+
+def near_duplicate_frame(df, columns):
+    """Clusters de casi duplicados (asunto + mensaje normalizados) de un frame; también es tarea del pool."""
+    texts = normalize_series(df[columns['subj']].astype(str) + " " + df[columns['msg']].astype(str))
+    return find_near_duplicates(texts)
+
+def dataset_duplicates(dataset, call=None):
+    """
+    Clusters de casi duplicados de un dataset; se calculan una vez y 'cluster' es el row_id
+    de la primera fila del cluster. call: cómo ejecutar la tarea (ej. EXECUTOR.call); por defecto, aquí.
+    """
+    def compute():
+        args = (dataset.df, dataset.columns)
+        duplicates = call(near_duplicate_frame, *args) if call else near_duplicate_frame(*args)
+        duplicates['cluster'] = dataset.row_ids[duplicates['cluster'].to_numpy()]
+        return duplicates
+    return dataset.lazy('duplicates', compute)
+
+async def ensure_duplicates(dataset, timer):
+    """
+    Calcula los clusters de un dataset si aún no los tiene. El MinHash de todas las filas
+    corre en el pool de procesos y ocupa un turno como un análisis (503 si la cola está llena).
+    """
+    if dataset.duplicates is not None:
+        return
+    try:
+        async with EXECUTOR.slot():
+            with timer.stage('dedupe'):
+                await run_in_threadpool(dataset_duplicates, dataset, EXECUTOR.call)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.")
+
+def deduplicated_statistics(dataset, timer):
+    """Estadísticas contando cada cluster de casi duplicados una sola vez (su primera fila)."""
+    with timer.stage('dedupe'):
+        duplicates = dataset_duplicates(dataset)
+        masks = dataset.categories['category_mask'].to_numpy()[~duplicates['is_duplicate'].to_numpy()]
+        statistics = summarize_categories(Counter(dataset.matcher.category_counts(masks)),
+                                          int(np.count_nonzero(masks == 0)))
+    return {"statistics": statistics, "duplicates": duplicate_summary(duplicates)}
+
+async def deduplicated_statistics_async(dataset, timer):
+    """deduplicated_statistics con los clusters calculados en el pool (ver ensure_duplicates)."""
+    await ensure_duplicates(dataset, timer)
+    return deduplicated_statistics(dataset, timer)
+
+def build_response(dataset_id, dataset, result, cached, timer, extras=None):
+    """Respuesta JSON serializada aquí para poder medir también la serialización."""
+    total_time = timer.elapsed()
+    print(f"--- Pag {result['pagination']['current_page']} de {result['pagination']['total_pages']} procesada en {total_time:.4f}s (cache: {cached}) ---")
+
+    payload = {
+        "status": "success",
+        "dataset_id": dataset_id,
+        "cached": cached,
+        "pagination": result["pagination"],
+        "statistics": dataset.statistics,
+        "data": result["data"],
+        "parse_info": dataset.parse_info,
+        "dictionary_version": dataset.matcher.version,
+        "timings": timer.as_dict(),
+        "processing_time": round(total_time, 4)
+    }
+    payload.update(extras or {})
+
+    with timer.stage('serialize'):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    STAGE_SECONDS.observe(timer.stages['serialize'], stage='serialize')
+
+    # Los tiempos por etapa también van en la cabecera estándar Server-Timing (ms)
+    server_timing = ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timer.stages.items())
+    return Response(content=body, media_type="application/json", headers={"Server-Timing": server_timing})
+
+@app.post("/analizar/")
+async def analyze_complaints_endpoint(
+    file: UploadFile = File(...), 
+    language: str = Form("es"),
+    col_subj: str = Form("Asunto"), 
+    col_msg: str = Form("Contenido"), 
+    col_date: str = Form("Fecha"),
+    type: bool = Form("Tipo"),
+    page: int = Form(1, ge=1),
+    limit: int = Form(50, ge=1),
+    profile: bool = Form(False),
+    category: Optional[List[str]] = Form(None),
+    keyword: Optional[str] = Form(None),
+    date_from: Optional[str] = Form(None),
+    date_to: Optional[str] = Form(None),
+    rating: Optional[List[int]] = Form(None),
+    cursor: Optional[int] = Form(None),
+    dedupe: bool = Form(False)
+):
+    """
+    Análisis de un archivo. Filtros opcionales de filas: category (puede repetirse),
+    keyword (término del diccionario), date_from / date_to ('YYYY-MM-DD') y rating
+    (puede repetirse). cursor: 'next_cursor' de la página anterior (alternativa a page).
+    dedupe: las estadísticas cuentan una sola vez cada grupo de reseñas casi duplicadas
+    y cada fila indica su cluster ('cluster', 'is_duplicate').
+    """
+    timer = RequestTimer()
+    filters = active_filters(category, keyword, date_from, date_to, rating)
     
-    df_page = df.iloc[start_idx:end_idx]
-    
-    page_data = []
+    # 1. Validación Idioma
+    validate_language(language)
     
-    for idx, row in df_page.iterrows():
-        subject_raw = str(row[col_subj])
-        # Limpieza individual usando la función universal
-        subject_clean = normalize_text(subject_raw)
-        
-        cats = []
-        keywords_found_row = {}
-        
-        for cat, terms in keywords.items():
-            clean_terms = [normalize_text(t) for t in terms]
-            found = [t for t in clean_terms if t in subject_clean]
-            if found:
-                cats.append(cat)
-                keywords_found_row[cat] = found
-        
-        if not cats: cats = ["sin_categoria"]
-        
-        item = {
-            'row_id': int(idx) + 1,
-            'date': row[col_date] if has_date else "N/A",
-            'subject': subject_raw, 
-            'preview': str(row[col_msg]),
-            'detected_categories': cats,
-            'keywords_found': keywords_found_row
-        }
-        page_data.append(item)
+    # 2. Caché por contenido: si ya se analizó este archivo, sólo paginamos.
+    # La versión del diccionario forma parte de la clave: una recarga invalida los resultados
+    matcher = resolve_matcher(language, type)
+    with timer.stage('read'):
+        contents = await file.read()
+    dataset_id = dataset_key(contents, language, type, col_subj, col_msg, col_date, matcher.version)
+    dataset = DATASET_CACHE.get(dataset_id)
+    cached = dataset is not None
+    extras = {}
 
-    sorted_summary = [{"category": c, "total_mentions": n} for c, n in category_counts.most_common()]
-    uncategorized = total_rows - global_mask.sum()
-    if uncategorized > 0:
-        sorted_summary.append({"category": "sin_categoria", "total_mentions": int(uncategorized)})
+    if profile:
+        # Perfilado bajo demanda: todo en este proceso (cProfile no ve los workers del pool)
+        def run_profiled():
+            with profiled(extras):
+                ds = dataset if cached else analyze_dataset(contents, language, col_subj, col_msg, col_date, type, timer, matcher)
+                if dedupe:
+                    extras.update(deduplicated_statistics(ds, timer))
+                return ds, paginate(ds, page, limit, timer, filters, cursor, dedupe)
+
+        try:
+            async with EXECUTOR.slot():
+                dataset, result = await run_in_threadpool(run_profiled)
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.")
+    else:
+        if not cached:
+            try:
+                async with EXECUTOR.slot():
+                    dataset = await analyze_dataset_async(contents, language, col_subj, col_msg, col_date, type, timer, matcher)
+            except QueueFullError:
+                raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.")
+        if dedupe:
+            # Antes de paginar: los clusters se calculan fuera del event loop y la página los reutiliza
+            extras.update(await deduplicated_statistics_async(dataset, timer))
+        if filters:
+            # La primera página de una vista filtrada evalúa los filtros sobre todas las filas
+            result = await run_in_threadpool(paginate, dataset, page, limit, timer, filters, cursor, dedupe)
+        else:
+            result = paginate(dataset, page, limit, timer, filters, cursor, dedupe)
+
+    if not cached:
+        DATASET_CACHE.put(dataset_id, dataset)
+    if filters:
+        extras["filters"] = filters
+
+    record_analysis(timer, 0 if cached else len(dataset.df), len(contents), cached)
+    return build_response(dataset_id, dataset, result, cached, timer, extras)
+
+def stream_analysis(first_chunk, reader, columns, matcher, timer):
+    """Genera NDJSON: una línea por fila y al final el registro con las estadísticas."""
+    category_counts = Counter({category: 0 for category in matcher.categories})
+    uncategorized = 0
+    total_rows = 0
+
+    chunk = first_chunk
+    while chunk is not None:
+        with timer.stage('categorize'):
+            df, categories = EXECUTOR.call(categorize_frame, chunk, columns, matcher)
+        add_worker_timings(timer, categories)
+
+        category_counts.update(matcher.category_counts(categories['category_mask']))
+        uncategorized += int((categories['category_mask'] == 0).sum())
+        total_rows += len(df)
+
+        with timer.stage('serialize'):
+            rows = serialize_frame(df, categories, matcher, columns)
+            lines = '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows) + '\n' if rows else None
+        if lines:
+            yield lines
+
+        with timer.stage('parse'):
+            chunk = next(reader, None)
+
+    total_time = timer.elapsed()
+    print(f"--- Stream de {total_rows} filas procesado en {total_time:.4f}s ---")
+    record_analysis(timer, total_rows, 0, cached=False)
+
+    yield json.dumps({
+        "status": "success",
+        "total_items": total_rows,
+        "statistics": summarize_categories(category_counts, uncategorized),
+        "timings": timer.as_dict(),
+        "processing_time": round(total_time, 4)
+    }, ensure_ascii=False) + '\n'
+
+class SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse que libera su turno del pool al terminar (o cortarse) el envío."""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.release()
+
+@app.post("/analizar/stream/")
+async def analyze_complaints_stream_endpoint(
+    file: UploadFile = File(...),
+    language: str = Form("es"),
+    col_subj: str = Form("Asunto"),
+    col_msg: str = Form("Contenido"),
+    col_date: str = Form("Fecha"),
+    type: bool = Form("Tipo"),
+    chunk_size: int = Form(CHUNK_ROWS)
+):
+    """
+    Variante en streaming para archivos muy grandes: lee el archivo por chunks,
+    categoriza cada uno y devuelve NDJSON (filas + estadísticas al final).
+    La memoria máxima depende de chunk_size, no del tamaño del archivo.
+    """
+    timer = RequestTimer()
+    validate_language(language)
+    matcher = resolve_matcher(language, type)
+
+    # El turno del pool se mantiene durante todo el envío (lo libera SlotStreamingResponse)
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(EXECUTOR.slot())
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.")
+
+    try:
+        # El archivo ya está en disco (SpooledTemporaryFile): se lee por partes, nunca entero
+        try:
+            with timer.stage('parse'):
+                _, reader = await run_in_threadpool(iter_csv_chunks, file.file, chunk_size)
+                first_chunk = await run_in_threadpool(next, reader, None)
+        except (CSVLoadError, ValueError, pd.errors.ParserError):
+            raise HTTPException(status_code=400, detail="No se pudo leer el archivo CSV. Verifica el formato y separadores.")
+
+        if first_chunk is None:
+            raise HTTPException(status_code=400, detail="El archivo CSV está vacío.")
+
+        # Las columnas se validan antes de empezar a enviar la respuesta
+        columns = resolve_columns(first_chunk.columns, col_subj, col_msg, col_date)
+    except BaseException:
+        await slot.aclose()
+        raise
+
+    return SlotStreamingResponse(
+        stream_analysis(first_chunk, reader, columns, matcher, timer),
+        slot.aclose,
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/analizar/{dataset_id}")
+async def analyze_cached_page(
+    dataset_id: str,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1),
+    category: Optional[List[str]] = Query(None),
+    keyword: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    rating: Optional[List[int]] = Query(None),
+    cursor: Optional[int] = None,
+    dedupe: bool = False
+):
+    """Páginas siguientes de un dataset ya subido, sin volver a enviar el archivo (mismos parámetros que /analizar/)."""
+    timer = RequestTimer()
+
+    dataset = DATASET_CACHE.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset no encontrado o expirado. Vuelve a subir el archivo.")
+
+    filters = active_filters(category, keyword, date_from, date_to, rating)
+    extras = {"filters": filters} if filters else {}
+    if dedupe:
+        extras.update(await deduplicated_statistics_async(dataset, timer))
+    if filters:
+        result = await run_in_threadpool(paginate, dataset, page, limit, timer, filters, cursor, dedupe)
+    else:
+        result = paginate(dataset, page, limit, timer, filters, cursor, dedupe)
+    record_analysis(timer, 0, 0, cached=True)
+    return build_response(dataset_id, dataset, result, True, timer, extras)
+
+@app.get("/analizar/{dataset_id}/exportar")
+async def export_cached_dataset(dataset_id: str, dedupe: bool = False):
+    """
+    Exportación completa de un dataset ya analizado (todas las filas categorizadas).
+    dedupe: cada fila indica además su cluster de casi duplicados ('cluster', 'is_duplicate').
+    """
+    dataset = DATASET_CACHE.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset no encontrado o expirado. Vuelve a subir el archivo.")
+
+    if dedupe:
+        await ensure_duplicates(dataset, RequestTimer())
+    response = {
+        "status": "success",
+        "dataset_id": dataset_id,
+        "statistics": dataset.statistics,
+        "data": await run_in_threadpool(serialize_rows, dataset, 0, len(dataset.df), dedupe),
+    }
+    if dedupe:
+        response["duplicates"] = duplicate_summary(dataset_duplicates(dataset))
+    return response
+
+def trend_response(daily, granularity, date_from, date_to, category, timer, **filters):
+    """Tendencias por día/semana/mes a partir de un rollup diario (coste por bucket, no por fila)."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity debe ser uno de {GRANULARITIES}")
+    validate_dates(date_from, date_to)
+
+    with timer.stage('buckets'):
+        trends = bucket_rollup(daily, granularity, date_from, date_to, category, **filters)
+    return {
+        "status": "success",
+        **trends,
+        "timings": timer.as_dict(),
+        "processing_time": round(timer.elapsed(), 4),
+    }
+
+def dataset_rollup(dataset):
+    """Rollup diario de un dataset de la caché (se calcula una vez y queda con el dataset)."""
+    def compute():
+        df, columns = dataset.df, dataset.columns
+        engine = SENTIMENT_ENGINES.get(dataset.language)
+        sentiment = engine.score_series(df[columns['subj']])['score'] if engine is not None else None
+        return daily_rollup(df[columns['date']], dataset.categories['category_mask'],
+                            dataset.matcher.category_bits, sentiment)
+    return dataset.lazy('rollup', compute)
+
+@app.get("/analizar/{dataset_id}/tendencias")
+def cached_dataset_trends(
+    dataset_id: str,
+    granularity: str = "month",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    category: Optional[List[str]] = Query(None)
+):
+    """
+    Menciones por categoría y sentimiento medio por día, semana o mes de un dataset ya subido.
+    Fechas 'YYYY-MM-DD' (inclusive); category puede repetirse ('total' siempre se incluye).
+    """
+    timer = RequestTimer()
+    dataset = DATASET_CACHE.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset no encontrado o expirado. Vuelve a subir el archivo.")
+    if not dataset.columns['date']:
+        raise HTTPException(status_code=400, detail="El dataset no tiene columna de fecha.")
+
+    with timer.stage('rollup'):
+        daily = dataset_rollup(dataset)
+    return trend_response(daily, granularity, date_from, date_to, category, timer)
+
+def read_store(columns, filters):
+    """Lectura del almacén (memory-map, columnas y filtros empujados al escaneo)."""
+    try:
+        return REVIEW_STORE.read(columns, **filters)
+    except RuntimeError as e:  # pyarrow no instalado
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def analyze_store_async(language, type, filters, timer, matcher):
+    """Categoriza las reseñas del almacén que cumplen los filtros (mismo camino que un archivo subido)."""
+    with timer.stage('parse'):
+        df = await run_in_threadpool(read_store, ['Subject', 'Review', 'Date', 'Rating'], filters)
+    parse_info = {'engine': 'parquet', 'rows': len(df), 'filters': {k: v for k, v in filters.items() if v}}
+
+    with timer.stage('categorize'):
+        results = await EXECUTOR.run_sharded(categorize_frame, df, STORE_ANALYSIS_COLUMNS, matcher)
+    for _, shard_categories in results:
+        add_worker_timings(timer, shard_categories)
+
+    with timer.stage('statistics'):
+        df, categories = concat_results(results)
+        return build_dataset(df, categories, matcher, STORE_ANALYSIS_COLUMNS, language, type, parse_info)
+
+@app.get("/almacen/")
+async def analyze_store_endpoint(
+    language: str = "es",
+    type: bool = False,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    rating: Optional[List[int]] = Query(None),
+    source: Optional[str] = None,
+    review_language: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1),
+    dedupe: bool = False
+):
+    """
+    Análisis directo sobre el almacén Parquet, sin subir archivos. Los filtros de
+    fecha y puntuación se aplican al leer. El resultado queda en la caché de datasets:
+    las páginas siguientes se piden a /analizar/{dataset_id}.
+    """
+    timer = RequestTimer()
+    validate_language(language)
+    validate_dates(date_from, date_to)
+
+    filters = {'date_from': date_from, 'date_to': date_to, 'rating': rating,
+               'source': source, 'language': review_language}
+    # La huella del almacén y la versión del diccionario forman parte de la clave:
+    # cualquier escritura o recarga invalida el resultado
+    matcher = resolve_matcher(language, type)
+    dataset_id = dataset_key(REVIEW_STORE.snapshot().encode('utf-8'), language, type,
+                             json.dumps(filters, sort_keys=True), matcher.version)
+    dataset = DATASET_CACHE.get(dataset_id)
+    cached = dataset is not None
+
+    if not cached:
+        try:
+            async with EXECUTOR.slot():
+                dataset = await analyze_store_async(language, type, filters, timer, matcher)
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Servidor ocupado, inténtalo de nuevo en unos segundos.")
+        DATASET_CACHE.put(dataset_id, dataset)
+
+    # Entre fuentes distintas (scraper, correos, subidas) la misma queja puede repetirse
+    extras = await deduplicated_statistics_async(dataset, timer) if dedupe else None
+    result = paginate(dataset, page, limit, timer, dedupe=dedupe)
+    record_analysis(timer, 0 if cached else len(dataset.df), 0, cached)
+    return build_response(dataset_id, dataset, result, cached, timer, extras)
+
+@app.get("/almacen/tendencias")
+def store_trends_endpoint(
+    language: str = "es",
+    type: bool = False,
+    granularity: str = "month",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    rating: Optional[List[int]] = Query(None),
+    source: Optional[str] = None,
+    review_language: Optional[str] = None
+):
+    """
+    Tendencias del almacén Parquet. El rollup diario vive en INSIGHT_ROLLUP_DIR y
+    cada consulta sólo categoriza los archivos escritos desde la anterior.
+    """
+    timer = RequestTimer()
+    validate_language(language)
+    validate_dates(date_from, date_to)
+    matcher = resolve_matcher(language, type)
+
+    with timer.stage('rollup'):
+        try:
+            daily, added = STORE_ROLLUPS.refresh(f"{language}-{DICTIONARY_KEYS[type]}-{matcher.version}", matcher,
+                                                 SENTIMENT_ENGINES.get(language))
+        except RuntimeError as e:  # pyarrow no instalado
+            raise HTTPException(status_code=503, detail=str(e))
+    ROWS_PROCESSED.inc(added)
+
+    return trend_response(daily, granularity, date_from, date_to, category, timer,
+                          rating=rating, source=source, review_language=review_language)
+
+@app.post("/analizar/{dataset_id}/guardar")
+def store_cached_dataset(dataset_id: str, source: str = Form("upload")):
+    """Guarda un dataset ya analizado (con sus categorías) en el almacén Parquet."""
+    dataset = DATASET_CACHE.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset no encontrado o expirado. Vuelve a subir el archivo.")
+
+    df, columns, matcher = dataset.df, dataset.columns, dataset.matcher
+    rating_col = next((c for c in POSSIBLE_RATING_COLS if c in df.columns), None)
+    frame = to_store_frame(df, {'Subject': columns['subj'], 'Review': columns['msg'],
+                                'Date': columns['date'], 'Rating': rating_col})
+
+    names = {mask: matcher.category_names(mask) for mask in dataset.categories['category_mask'].unique()}
+    frame['Categories'] = dataset.categories['category_mask'].map(names).to_numpy()
+
+    try:
+        rows = REVIEW_STORE.write(frame, source, dataset.language)
+    except RuntimeError as e:  # pyarrow no instalado
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"status": "success", "dataset_id": dataset_id, "stored_rows": rows, "store": REVIEW_STORE.root}
+
+def get_index(index_id):
+    """Índice cargado en memoria; se vuelve a leer si su meta.json cambió (reconstrucción)."""
+    meta_path = os.path.join(INDEX_DIR, index_id, INDEX_META)
+    if not VALID_INDEX_ID.match(index_id) or not os.path.exists(meta_path):
+        raise HTTPException(status_code=404, detail="Índice no encontrado. Créalo con analysis_index.py.")
+
+    index = LOADED_INDEXES.get(index_id)
+    if index is None or index.mtime != os.path.getmtime(meta_path):
+        index = LOADED_INDEXES[index_id] = AnalysisIndex(os.path.join(INDEX_DIR, index_id))
+    return index
+
+def index_summary(index_id, meta):
+    return {
+        "index_id": index_id,
+        "rows": meta['rows'],
+        "language": meta['language'],
+        "built_at": meta['built_at'],
+        "dictionary_version": meta.get('dictionary_version'),
+        "date_range": meta['date_range'],
+    }
+
+@app.get("/indices/")
+def list_indexes():
+    """Índices disponibles en INSIGHT_INDEX_DIR."""
+    indexes = []
+    if os.path.isdir(INDEX_DIR):
+        for index_id in sorted(os.listdir(INDEX_DIR)):
+            meta_path = os.path.join(INDEX_DIR, index_id, INDEX_META)
+            if VALID_INDEX_ID.match(index_id) and os.path.exists(meta_path):
+                with open(meta_path, encoding='utf-8') as fh:
+                    indexes.append(index_summary(index_id, json.load(fh)))
+    return {"status": "success", "indices": indexes}
+
+@app.get("/indices/{index_id}")
+def index_statistics_endpoint(index_id: str, type: bool = False):
+    """Estadísticas globales precalculadas (categorías y sentimiento) de un índice."""
+    timer = RequestTimer()
+    index = get_index(index_id)
+    dictionary = index.meta['dictionaries'][DICTIONARY_KEYS[type]]
+
+    return {
+        "status": "success",
+        **index_summary(index_id, index.meta),
+        "statistics": summarize_categories(Counter(dictionary['category_counts']), dictionary['uncategorized']),
+        "sentiment": {**index.meta['sentiment'], "by_category": dictionary['sentiment_by_category']},
+        "processing_time": round(timer.elapsed(), 4),
+    }
+
+@app.get("/indices/{index_id}/filas")
+def index_rows_endpoint(
+    index_id: str,
+    type: bool = False,
+    category: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    rating: Optional[List[int]] = Query(None),
+    sentiment: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1)
+):
+    """
+    Filas de un índice filtradas por categoría, fechas ('YYYY-MM-DD'), puntuación y
+    sentimiento ('positive', 'negative', 'neutral'), paginadas. Las estadísticas
+    devueltas son las del subconjunto filtrado.
+    """
+    timer = RequestTimer()
+    index = get_index(index_id)
+    validate_dates(date_from, date_to)
+    if sentiment and sentiment not in SENTIMENT_FILTERS:
+        raise HTTPException(status_code=400, detail=f"sentiment debe ser uno de {SENTIMENT_FILTERS}")
 
-    total_time = time.time() - t_start
-    print(f"--- Pag {page} de {total_pages} procesada en {total_time:.4f}s ---")
+    with timer.stage('filter'):
+        try:
+            keep = index.filter_mask(type, category, date_from, date_to, rating, sentiment)
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Categoría desconocida: {category}")
+        masks = index.rows[mask_column(type)].to_numpy()[keep]
+        counts = Counter({cat: int(np.count_nonzero(masks & bit)) for cat, bit in index.category_bits(type).items()})
+        statistics = summarize_categories(counts, int(np.count_nonzero(masks == 0)))
+
+    total_rows = len(masks)
+    start_idx = (page - 1) * limit
+    with timer.stage('paginate'):
+        rows = index.select(keep, start_idx, start_idx + limit)
+        # Las palabras clave sólo se calculan para las filas de la página, con la versión de
+        # diccionario del índice (la de sus máscaras); si ya no está compilada, se omiten
+        index_version = index.meta.get('dictionary_version')
+        dictionary_set = DICTIONARIES.get(index_version)
+        if dictionary_set is not None:
+            matcher = dictionary_set.get_matcher(index.meta['language'], type)
+            keywords = matcher.categorize(normalize_series(rows['subject']))['keywords_found'].tolist()
+        else:
+            keywords = [None] * len(rows)
+        data = [{
+            "row_id": int(row_id),
+            "date": date if isinstance(date, str) else "N/A",
+            "subject": subject,
+            "preview": review,
+            "detected_categories": index.category_names(type, int(mask)) or ["sin_categoria"],
+            **({"keywords_found": kw} if dictionary_set is not None else {}),
+            "rating": None if pd.isna(rating_value) else int(rating_value),
+            "sentiment": int(score),
+        } for row_id, date, subject, review, mask, rating_value, score, kw in zip(
+            rows['row_id'], rows['date'], rows['subject'], rows['review'], rows[mask_column(type)],
+            rows['rating'], rows['sentiment'], keywords)]
+
+    extras = {}
+    current_version = DICTIONARIES.current().version
+    if index_version != current_version:
+        extras["dictionary_mismatch"] = {"index": index_version, "current": current_version,
+                                         "keywords_found": dictionary_set is not None}
 
     return {
         "status": "success",
+        "index_id": index_id,
+        "dictionary_version": index_version,
+        **extras,
         "pagination": {
             "current_page": page,
             "items_per_page": limit,
-            "total_pages": total_pages,
-            "total_items": total_rows
+            "total_pages": math.ceil(total_rows / limit),
+            "total_items": total_rows,
         },
-        "statistics": sorted_summary,
-        "data": page_data,
-        "processing_time": round(total_time, 4)
+        "statistics": statistics,
+        "data": data,
+        "timings": timer.as_dict(),
+        "processing_time": round(timer.elapsed(), 4),
     }
+
+@app.get("/indices/{index_id}/tendencias")
+def index_trends_endpoint(
+    index_id: str,
+    type: bool = False,
+    granularity: str = "month",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    category: Optional[List[str]] = Query(None)
+):
+    """Tendencias de un índice a partir de su rollup diario precalculado."""
+    timer = RequestTimer()
+    daily = get_index(index_id).daily_rollup(type)
+    if daily is None:
+        raise HTTPException(status_code=409, detail="El índice no tiene rollups: reconstrúyelo con analysis_index.py.")
+    return trend_response(daily, granularity, date_from, date_to, category, timer)
@@ -0,0 +1,141 @@
+"""
+Motor de coincidencia multi-patrón para la categorización de /analizar/.
+
+Cada diccionario {categoria: [terminos]} se compila UNA sola vez en un
+autómata (trie de términos normalizados) que se recorre en una única pasada
+lineal sobre el texto y devuelve todas las categorías y palabras clave
+encontradas a la vez, en lugar de categorías × términos búsquedas.
+
+Para datasets completos, categorize() devuelve el resultado en forma columnar
+(máscara de bits de categorías por fila + palabras clave) para poder paginar
+o exportar cualquier rango sin trabajo Python por fila.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def _trie_pattern(terms):
+    """Convierte la lista de términos en una expresión con forma de trie."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True  # Marca de fin de término
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+        if not alts:
+            return ''
+        body = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+        # Si aquí termina un término, la continuación es opcional (greedy: gana el más largo)
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Autómata compilado para un diccionario de categorías.
+    Mantiene la semántica original (búsqueda por subcadena sobre texto ya
+    normalizado) y el orden de los términos del diccionario.
+    """
+
+    def __init__(self, dictionary, normalizer):
+        self.categories = list(dictionary.keys())
+        # Bit de cada categoría en la máscara (mismo orden que el diccionario)
+        self.category_bits = {cat: 1 << i for i, cat in enumerate(self.categories)}
+        self._mask_names = {}
+        self.version = None  # Versión del diccionario de origen (la asigna dictionaries.py)
+
+        # Términos limpios por categoría, con la misma función de normalización que el texto
+        self.category_terms = {
+            cat: [t for t in (normalizer(term) for term in terms) if t]
+            for cat, terms in dictionary.items()
+        }
+
+        unique_terms = list(dict.fromkeys(t for terms in self.category_terms.values() for t in terms))
+
+        # Un término largo implica todos los términos contenidos en él
+        # (ej: 'sitzplatz' -> 'sitz'), así el autómata sólo reporta el más largo en cada posición
+        self._implied = {
+            term: frozenset(other for other in unique_terms if other in term)
+            for term in unique_terms
+        }
+
+        # Lookahead: se prueba el trie en cada posición sin consumir texto (coincidencias solapadas)
+        self._regex = re.compile('(?=(' + _trie_pattern(unique_terms) + '))') if unique_terms else None
+
+    def find_terms(self, text):
+        """Devuelve el conjunto de términos presentes en un texto ya normalizado."""
+        if not text or self._regex is None:
+            return set()
+
+        found = set()
+        for term in set(self._regex.findall(text)):
+            found |= self._implied[term]
+        return found
+
+    def _keywords_for(self, found):
+        result = {}
+        for cat, terms in self.category_terms.items():
+            hits = [t for t in terms if t in found]
+            if hits:
+                result[cat] = hits
+        return result
+
+    def match(self, text):
+        """
+        Una sola pasada sobre el texto normalizado.
+        Devuelve {categoria: [terminos encontrados]} sólo con las categorías detectadas.
+        """
+        found = self.find_terms(text)
+        if not found:
+            return {}
+        return self._keywords_for(found)
+
+    def categorize(self, series):
+        """
+        Categoriza una Serie de textos normalizados de una vez.
+        Devuelve un DataFrame con el mismo índice y columnas:
+          - 'category_mask': bits de las categorías detectadas (int64)
+          - 'keywords_found': {categoria: [terminos]} (objetos compartidos, no mutar)
+        """
+        findall = self._regex.findall if self._regex is not None else (lambda text: [])
+
+        # Muchas filas comparten el mismo conjunto de términos: se resuelve una vez por conjunto
+        resolved = {}
+        masks = np.zeros(len(series), dtype=np.int64)
+        keywords = [None] * len(series)
+
+        for i, text in enumerate(series):
+            key = frozenset(findall(text)) if text else frozenset()
+            entry = resolved.get(key)
+            if entry is None:
+                found = set()
+                for term in key:
+                    found |= self._implied[term]
+                kw = self._keywords_for(found)
+                entry = resolved[key] = (sum(self.category_bits[cat] for cat in kw), kw)
+            masks[i], keywords[i] = entry
+
+        return pd.DataFrame({'category_mask': masks, 'keywords_found': keywords}, index=series.index)
+
+    def category_names(self, mask):
+        """Máscara -> lista de categorías en orden del diccionario (memoizado)."""
+        names = self._mask_names.get(mask)
+        if names is None:
+            names = self._mask_names[mask] = [cat for cat in self.categories if mask & self.category_bits[cat]]
+        return names
+
+    def category_counts(self, masks):
+        """Número de filas por categoría a partir de la columna de máscaras."""
+        masks = np.asarray(masks, dtype=np.int64)
+        return {cat: int(np.count_nonzero(masks & bit)) for cat, bit in self.category_bits.items()}
+
+
+def build_matchers(dictionaries, normalizer):
+    """Compila un KeywordMatcher por idioma: {idioma: KeywordMatcher}."""
+    return {lang: KeywordMatcher(keywords, normalizer) for lang, keywords in dictionaries.items()}
@@ -0,0 +1,165 @@
+"""
+Detección de reseñas casi duplicadas (reenviadas o ligeramente editadas) con MinHash + LSH.
+
+Cada texto (ya pasado por normalize_text) se divide en shingles de 5 caracteres;
+su firma MinHash son los mínimos de NUM_PERM permutaciones hash del conjunto, y
+la fracción de posiciones iguales entre dos firmas estima su similitud de Jaccard.
+Las firmas se parten en bandas (LSH): sólo se comparan textos que coinciden en
+alguna banda completa, así que el coste crece linealmente con el número de
+reseñas en lugar de comparar todas contra todas.
+
+Los shingles y las firmas se calculan con numpy sobre bloques de textos; los
+textos idénticos se firman una sola vez.
+"""
+import numpy as np
+import pandas as pd
+
+SHINGLE_SIZE = 5      # Caracteres (bytes UTF-8) por shingle
+NUM_PERM = 64         # Permutaciones de la firma MinHash
+BANDS = 16            # Bandas LSH (NUM_PERM / BANDS filas por banda)
+THRESHOLD = 0.8       # Similitud de Jaccard estimada mínima para agrupar
+SEED = 1
+BLOCK_TEXTS = 10000   # Textos firmados a la vez (acota la memoria)
+
+_PRIME = 4294967311   # Primo > 2^32 para las permutaciones (a*x + b) mod p
+_BASE = np.uint64(1099511628211)
+
+
+def _shingle_hashes(texts, k=SHINGLE_SIZE):
+    """
+    Hashes de 32 bits de todas las ventanas de k bytes de cada texto, calculados
+    a la vez sobre el buffer concatenado. Devuelve (hashes, inicio de cada texto).
+    Un texto más corto que k se rellena hasta formar un único shingle.
+    """
+    encoded = [t.encode('utf-8').ljust(k) for t in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    # Hash polinómico de cada ventana (aritmética uint64 con desbordamiento)
+    windows = len(buffer) - k + 1
+    hashes = np.zeros(windows, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for j in range(k):
+            hashes = hashes * _BASE + buffer[j:j + windows]
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+    # Sólo las ventanas que no cruzan el final de su texto
+    ends = np.cumsum(lengths)
+    valid = np.arange(windows) + k <= np.repeat(ends, lengths)[:windows]
+    counts = lengths - k + 1
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return hashes[valid], starts
+
+
+class MinHasher:
+    """Firmas MinHash (NUM_PERM valores uint32 por texto) con permutaciones fijas por semilla."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=SEED):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31: a*x + b no desborda uint64 con x < 2^32
+        self.a = rng.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signatures(self, texts):
+        """Matriz (len(texts), num_perm) de firmas; texts: lista de textos normalizados no vacíos."""
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for block_start in range(0, len(texts), BLOCK_TEXTS):
+            block = texts[block_start:block_start + BLOCK_TEXTS]
+            hashes, starts = _shingle_hashes(block)
+            for p in range(self.num_perm):
+                permuted = (self.a[p] * hashes + self.b[p]) % np.uint64(_PRIME)
+                mins = np.minimum.reduceat(permuted, starts)
+                out[block_start:block_start + len(block), p] = np.minimum(mins, np.uint64(0xFFFFFFFF))
+        return out
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH incremental: add() recibe lotes de textos (ej. bloques de un CSV o
+    de varias fuentes) y asigna cada fila a un cluster identificado por su primera
+    fila (numeración global desde el primer lote). Una fila se une al cluster de
+    un representante con el que comparte una banda si su similitud estimada con
+    él alcanza el umbral; si no, abre un cluster nuevo. Los textos vacíos nunca
+    se agrupan.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, seed)
+        self.rows = 0
+        self._buckets = [{} for _ in range(bands)]  # clave de banda -> fila representante
+        self._signatures = {}  # fila representante -> firma
+
+    def _band_keys(self, signatures):
+        """Una lista de claves (bytes) por banda, con una clave por firma."""
+        per_band = signatures.reshape(len(signatures), self.bands, -1)
+        width = per_band.shape[2] * per_band.itemsize
+        return [np.ascontiguousarray(per_band[:, band, :]).view(f'V{width}').ravel().tolist()
+                for band in range(self.bands)]
+
+    def add(self, texts):
+        """Añade un lote de textos normalizados; devuelve el cluster de cada uno (array int64)."""
+        values = pd.Series(texts, dtype=object).fillna("").astype(str)
+        codes, uniques = pd.factorize(values)  # orden de primera aparición
+        first_pos = np.full(len(uniques), len(values), dtype=np.int64)
+        np.minimum.at(first_pos, codes, np.arange(len(values)))
+
+        uniques = list(uniques)
+        signed = [i for i, text in enumerate(uniques) if text.strip()]
+        clusters = self.rows + first_pos  # por defecto, cada texto distinto es su propio cluster
+        if signed:
+            signatures = self.hasher.signatures([uniques[i] for i in signed])
+            keys = self._band_keys(signatures)
+        min_equal = self.threshold * self.hasher.num_perm
+
+        for j, i in enumerate(signed):
+            signature = signatures[j]
+            cluster = None
+            for band in range(self.bands):
+                representative = self._buckets[band].get(keys[band][j])
+                if representative is not None and \
+                        np.count_nonzero(self._signatures[representative] == signature) >= min_equal:
+                    cluster = representative
+                    break
+
+            if cluster is None:
+                cluster = int(clusters[i])
+                self._signatures[cluster] = signature
+            clusters[i] = cluster
+            for band in range(self.bands):
+                self._buckets[band].setdefault(keys[band][j], cluster)
+
+        result = clusters[codes]
+        empty = np.flatnonzero(~values.str.strip().astype(bool).to_numpy())
+        result[empty] = self.rows + empty
+        self.rows += len(values)
+        return result
+
+
+def find_near_duplicates(texts, threshold=THRESHOLD):
+    """
+    Clusters de casi duplicados de una Serie de textos normalizados.
+    Devuelve un DataFrame con el mismo índice y columnas:
+      - 'cluster': posición (0..n-1) de la primera fila del cluster
+      - 'is_duplicate': True si la fila repite una anterior de su cluster
+      - 'cluster_size': filas del cluster
+    """
+    clusters = NearDuplicateIndex(threshold).add(texts)
+    sizes = np.bincount(clusters, minlength=len(clusters))
+    return pd.DataFrame({
+        'cluster': clusters,
+        'is_duplicate': clusters != np.arange(len(clusters)),
+        'cluster_size': sizes[clusters],
+    }, index=texts.index)
+
+
+def duplicate_summary(duplicates):
+    """Resumen para respuestas e informes: clusters con repeticiones y filas repetidas."""
+    return {
+        "clusters": int(duplicates.loc[duplicates['cluster_size'] > 1, 'cluster'].nunique()),
+        "duplicate_rows": int(duplicates['is_duplicate'].sum()),
+    }
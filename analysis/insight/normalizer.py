@@ -0,0 +1,70 @@
+"""
+Limpieza universal de texto (acentos fuera, ñ preservada, minúsculas), versión rápida.
+
+- Camino rápido para texto ASCII: sólo lower().
+- Tabla de traducción precalculada para Latin-1 y Latin Extended-A/B.
+- Cualquier otro carácter usa la normalización Unicode completa de siempre.
+- Caché acotada para textos repetidos ("Sin Título", "Verspätung", ...).
+"""
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MEMO_SIZE = 65536
+
+# Rango cubierto por la tabla: ASCII + Latin-1 Supplement + Latin Extended-A/B
+_TABLE_LIMIT = '\u0250'
+
+
+def _normalize_slow(text):
+    """
+    Elimina acentos y diacríticos de cualquier idioma (fr, de, es, pt)
+    usando normalización Unicode, pero preserva la ñ/Ñ.
+    """
+    # 1. Proteger la ñ/Ñ reemplazándolas por marcadores temporales (uso privado, no aparecen en texto real)
+    text = text.replace('ñ', '\ue000').replace('Ñ', '\ue001')
+
+    # 2. Normalizar a NFD (descompone caracteres, ej: ü -> u + ¨)
+    text = unicodedata.normalize('NFD', text)
+
+    # 3. Filtrar caracteres que sean marcas de no espaciado (Mn) - Elimina los acentos
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+
+    # 4. Restaurar ñ/Ñ y convertir a minúsculas
+    return text.replace('\ue000', 'ñ').replace('\ue001', 'ñ').lower()
+
+
+# Cada carácter del rango se resuelve una vez con la versión completa
+_LATIN_TABLE = str.maketrans({cp: _normalize_slow(chr(cp)) for cp in range(0x80, 0x250)})
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _normalize_cached(text):
+    if text.isascii():
+        return text.lower()
+    if max(text) < _TABLE_LIMIT:
+        return text.translate(_LATIN_TABLE).lower()
+    return _normalize_slow(text)
+
+
+def normalize_text(text):
+    """
+    Elimina acentos y diacríticos (fr, de, es, pt) preservando la ñ/Ñ, en minúsculas.
+    Misma salida que la versión basada sólo en NFD (los marcadores internos ya
+    no chocan con caracteres de control \\x01/\\x02 del propio texto).
+    """
+    if not isinstance(text, str): return ""
+    return _normalize_cached(text)
+
+
+def normalize_series(series):
+    """
+    Normaliza una Serie entera de una vez: cada valor distinto se limpia una
+    sola vez y el resultado se expande por índice.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    cleaned = np.array([normalize_text(u) for u in uniques] + [""], dtype=object)
+    # codes == -1 (nulos) apunta al "" del final
+    return pd.Series(cleaned[codes], index=series.index, dtype=object)
@@ -0,0 +1,210 @@
+"""
+Almacén columnar de reseñas en Parquet, compartido por el scraper, tellapart.py y el API.
+
+En lugar de pasar CSVs de un paso a otro (cada uno con su separador y su
+codificación), las reseñas se guardan con tipos fijos en un dataset Parquet
+particionado al estilo Hive:
+
+    <raíz>/source=trustpilot/language=de/month=2025-11/part-<id>-0.parquet
+
+Columnas: Subject, Review, Date (date32), Rating (int8), Sentiment (int32) y
+Categories (lista de texto). Las lecturas usan memory-map, leen sólo las
+columnas pedidas y empujan los filtros de fecha/puntuación al escaneo
+(directorios de meses descartados y row groups saltados por estadísticas).
+
+    python review_store.py <raíz> --date-from 2025-01-01 --rating 1 2
+"""
+import argparse
+import os
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs as pa_fs
+except ImportError:  # pyarrow es opcional (sólo lo necesita el almacén)
+    pa = None
+
+STORE_COLUMNS = ['Subject', 'Review', 'Date', 'Rating', 'Sentiment', 'Categories']
+PARTITION_COLUMNS = ['source', 'language', 'month']
+UNKNOWN_MONTH = 'unknown'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("El almacén de reseñas necesita pyarrow (pip install pyarrow)")
+
+
+def store_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ('Subject', pa.string()),
+        ('Review', pa.string()),
+        ('Date', pa.date32()),
+        ('Rating', pa.int8()),
+        ('Sentiment', pa.int32()),
+        ('Categories', pa.list_(pa.string())),
+    ])
+
+
+def partition_schema():
+    _require_pyarrow()
+    return pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+
+
+def to_store_frame(df, columns):
+    """
+    Adapta un frame cualquiera al esquema del almacén.
+    columns: {'Subject': 'Asunto', 'Review': 'Reseña', ...}; las columnas del
+    almacén que no aparezcan quedan vacías (nulas).
+    """
+    out = pd.DataFrame(index=df.index)
+    for name in STORE_COLUMNS:
+        source = columns.get(name)
+        out[name] = df[source] if source is not None and source in df.columns else None
+
+    out['Subject'] = out['Subject'].astype(object).where(out['Subject'].notna(), None)
+    out['Review'] = out['Review'].astype(object).where(out['Review'].notna(), None)
+    out['Date'] = pd.to_datetime(out['Date'], errors='coerce').dt.date
+    out['Rating'] = pd.to_numeric(out['Rating'], errors='coerce').astype('Int8')
+    out['Sentiment'] = pd.to_numeric(out['Sentiment'], errors='coerce').astype('Int32')
+    return out.reset_index(drop=True)
+
+
+class ReviewStore:
+    """Dataset Parquet particionado por source/language/month bajo `root`."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    @property
+    def exists(self):
+        return os.path.isdir(self.root)
+
+    def _dataset(self, paths=None):
+        """Dataset completo o sólo los archivos `paths` (rutas relativas a la raíz)."""
+        _require_pyarrow()
+        source = [os.path.join(self.root, p) for p in paths] if paths is not None else self.root
+        # use_mmap: los archivos se mapean en memoria en lugar de copiarse a búferes
+        return ds.dataset(source, schema=pa.unify_schemas([store_schema(), partition_schema()]),
+                          format='parquet', partitioning=ds.partitioning(partition_schema(), flavor='hive'),
+                          partition_base_dir=self.root, filesystem=pa_fs.LocalFileSystem(use_mmap=True))
+
+    def write(self, frame, source, language):
+        """
+        Añade las filas de un frame con el esquema del almacén (ver to_store_frame).
+        Cada escritura crea archivos nuevos: nunca reescribe los existentes.
+        Devuelve el número de filas escritas.
+        """
+        _require_pyarrow()
+        if frame.empty:
+            return 0
+
+        table = pa.Table.from_pandas(frame[STORE_COLUMNS], schema=store_schema(), preserve_index=False)
+        months = pc.fill_null(pc.strftime(table['Date'].cast(pa.timestamp('s')), format='%Y-%m'), UNKNOWN_MONTH)
+        table = (table.append_column('source', pa.array([source] * len(table), pa.string()))
+                      .append_column('language', pa.array([language] * len(table), pa.string()))
+                      .append_column('month', months))
+
+        os.makedirs(self.root, exist_ok=True)
+        ds.write_dataset(table, self.root, format='parquet',
+                         partitioning=ds.partitioning(partition_schema(), flavor='hive'),
+                         basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+        return len(table)
+
+    def _filter(self, date_from=None, date_to=None, rating=None, source=None, language=None):
+        """
+        Expresión de filtro. Las fechas filtran también por la partición 'month'
+        para descartar directorios enteros antes de abrir ningún archivo.
+        """
+        conditions = []
+        if date_from:
+            date_from = pd.Timestamp(date_from).date()
+            conditions.append((pc.field('month') >= date_from.strftime('%Y-%m')) | (pc.field('month') == UNKNOWN_MONTH))
+            conditions.append(pc.field('Date') >= pa.scalar(date_from, pa.date32()))
+        if date_to:
+            date_to = pd.Timestamp(date_to).date()
+            conditions.append(pc.field('month') <= date_to.strftime('%Y-%m'))
+            conditions.append(pc.field('Date') <= pa.scalar(date_to, pa.date32()))
+        if rating is not None:
+            ratings = [rating] if isinstance(rating, int) else list(rating)
+            conditions.append(pc.field('Rating').isin(pa.array(ratings, pa.int8())))
+        if source:
+            conditions.append(pc.field('source') == source)
+        if language:
+            conditions.append(pc.field('language') == language)
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scanner(self, columns=None, batch_size=None, **filters):
+        """Scanner de pyarrow con las columnas y filtros pedidos (ver read)."""
+        options = {'columns': columns, 'filter': self._filter(**filters)}
+        if batch_size:
+            options['batch_size'] = batch_size
+        return self._dataset().scanner(**options)
+
+    def read(self, columns=None, **filters):
+        """
+        Lee el almacén como DataFrame.
+        columns: sólo estas columnas (las demás no se leen del disco)
+        filters: date_from, date_to ('YYYY-MM-DD'), rating (int o lista), source, language
+        """
+        if not self.exists:
+            return pd.DataFrame(columns=columns or STORE_COLUMNS + PARTITION_COLUMNS)
+        return self.scanner(columns, **filters).to_table().to_pandas()
+
+    def iter_batches(self, columns=None, batch_size=50000, **filters):
+        """Como read, pero por bloques de como mucho batch_size filas (memoria acotada)."""
+        if not self.exists:
+            return
+        for batch in self.scanner(columns, batch_size, **filters).to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def read_files(self, paths, columns=None):
+        """Lee sólo los archivos `paths` (ver files), ej. los añadidos desde la última lectura."""
+        if not paths:
+            return pd.DataFrame(columns=columns or STORE_COLUMNS + PARTITION_COLUMNS)
+        return self._dataset(paths).to_table(columns=columns).to_pandas()
+
+    def files(self):
+        """{ruta relativa: 'tamaño:mtime_ns'} de cada archivo Parquet del almacén."""
+        entries = {}
+        if self.exists:
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith('.parquet'):
+                        stat = os.stat(os.path.join(dirpath, name))
+                        entries[os.path.relpath(os.path.join(dirpath, name), self.root)] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        return entries
+
+    def snapshot(self):
+        """
+        Huella del contenido actual (rutas, tamaños y fechas de modificación).
+        Cambia con cada escritura: sirve como parte de la clave de caché.
+        """
+        return "\n".join(sorted(f"{path}:{version}" for path, version in self.files().items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta rápida del almacén de reseñas.")
+    parser.add_argument("root")
+    parser.add_argument("--columns", nargs="+", default=None)
+    parser.add_argument("--date-from", default=None)
+    parser.add_argument("--date-to", default=None)
+    parser.add_argument("--rating", type=int, nargs="+", default=None)
+    parser.add_argument("--source", default=None)
+    parser.add_argument("--language", default=None)
+    args = parser.parse_args()
+
+    df = ReviewStore(args.root).read(args.columns, date_from=args.date_from, date_to=args.date_to,
+                                     rating=args.rating, source=args.source, language=args.language)
+    print(f"{len(df)} filas")
+    print(df.head(20).to_string())
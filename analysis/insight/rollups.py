@@ -0,0 +1,222 @@
+"""
+Agregados temporales (rollups) de categorías y sentimiento para los gráficos de tendencia.
+
+Las reseñas se resumen UNA vez en filas diarias (día x categoría: menciones,
+suma y número de puntajes de sentimiento). Una consulta por día, semana o mes
+sólo agrupa esas filas diarias: su coste depende del número de días del rango,
+no del número de reseñas. Los rollups diarios se pueden sumar entre sí, así que
+las reseñas nuevas se incorporan sin recalcular las antiguas (ver StoreRollups).
+"""
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from normalizer import normalize_series
+
+ROLLUP_VALUES = ['count', 'sentiment_sum', 'sentiment_count']
+STORE_KEYS = ['source', 'review_language', 'rating']  # claves extra de los rollups del almacén
+GRANULARITIES = ['day', 'week', 'month']
+TOTAL = 'total'
+UNCATEGORIZED = 'sin_categoria'
+
+ROLLUP_FILE = "rollups.parquet"
+ROLLUP_STATE = "files.json"
+
+
+def daily_rollup(dates, masks, category_bits, sentiment=None, keys=None):
+    """
+    Rollup diario de un conjunto de reseñas.
+    dates: fechas por fila (texto 'YYYY-MM-DD', datetime o date; las inválidas se descartan)
+    masks: máscaras de categoría por fila; category_bits: {categoria: bit}
+    sentiment: puntaje por fila (nulo = sin puntaje) o None
+    keys: {columna: valores por fila} para agrupar además por ellas (ej. source)
+    Devuelve un DataFrame: claves..., day, category, count, sentiment_sum, sentiment_count.
+    Además de las categorías incluye 'total' (todas las reseñas) y 'sin_categoria'.
+    """
+    keys = keys or {}
+    days = pd.to_datetime(pd.Series(dates).astype(str).str[:10].to_numpy(), format='%Y-%m-%d', errors='coerce')
+    frame = pd.DataFrame({
+        'day': days.strftime('%Y-%m-%d'),
+        'mask': np.asarray(masks, dtype=np.int64),
+        'sentiment': (pd.to_numeric(pd.Series(sentiment).to_numpy(), errors='coerce')
+                      if sentiment is not None else np.nan),
+    })
+    for name, values in keys.items():
+        frame[name] = pd.Series(values).to_numpy()
+    frame = frame[frame['day'].notna()]
+
+    # Primero por máscara distinta (pocas combinaciones por día), después se reparte por bits
+    group = list(keys) + ['day']
+    per_mask = (frame.groupby(group + ['mask'], sort=False, dropna=False)
+                     .agg(count=('mask', 'size'), sentiment_sum=('sentiment', 'sum'),
+                          sentiment_count=('sentiment', 'count'))
+                     .reset_index())
+
+    parts = [per_mask.assign(category=TOTAL), per_mask[per_mask['mask'] == 0].assign(category=UNCATEGORIZED)]
+    for cat, bit in category_bits.items():
+        parts.append(per_mask[(per_mask['mask'] & bit) != 0].assign(category=cat))
+    return merge_rollups([pd.concat(parts, ignore_index=True).drop(columns='mask')], keys=list(keys))
+
+
+def merge_rollups(rollups, keys=()):
+    """
+    Suma rollups diarios con las mismas claves (incorporar filas nuevas a uno existente).
+    keys: claves extra; un rollup vacío las conserva como columnas (los filtros siguen funcionando).
+    """
+    rollups = [r for r in rollups if r is not None and not r.empty]
+    if not rollups:
+        return pd.DataFrame(columns=list(keys) + ['day', 'category'] + ROLLUP_VALUES)
+
+    merged = pd.concat(rollups, ignore_index=True)
+    group = [c for c in merged.columns if c not in ROLLUP_VALUES]
+    merged = merged.groupby(group, sort=False, dropna=False)[ROLLUP_VALUES].sum().reset_index()
+    merged['count'] = merged['count'].astype(np.int64)
+    merged['sentiment_sum'] = merged['sentiment_sum'].astype(np.float64)
+    merged['sentiment_count'] = merged['sentiment_count'].astype(np.int64)
+    return merged.sort_values(['day', 'category'], ignore_index=True)
+
+
+def bucket_labels(first_day, last_day, granularity):
+    """Todos los buckets entre dos días (los vacíos también, para ejes continuos)."""
+    if granularity == 'month':
+        return list(pd.period_range(first_day, last_day, freq='M').strftime('%Y-%m'))
+    if granularity == 'week':
+        first_day = pd.Timestamp(first_day) - pd.Timedelta(days=pd.Timestamp(first_day).weekday())
+        return list(pd.date_range(first_day, last_day, freq='7D').strftime('%Y-%m-%d'))
+    return list(pd.date_range(first_day, last_day, freq='D').strftime('%Y-%m-%d'))
+
+
+def bucket_rollup(daily, granularity='month', date_from=None, date_to=None, categories=None, **filters):
+    """
+    Agrupa un rollup diario por día, semana (lunes de inicio) o mes.
+    date_from / date_to: 'YYYY-MM-DD' (inclusive); categories: lista (None = todas)
+    filters: {clave: valor o lista} sobre las claves extra del rollup (None = sin filtro)
+    Devuelve {'granularity', 'buckets': [etiquetas], 'series': {categoria: {'counts', 'sentiment'}}}
+    con 'total' primero, el resto por menciones y 'sin_categoria' al final.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity debe ser uno de {GRANULARITIES}")
+    if daily.empty:
+        return {'granularity': granularity, 'buckets': [], 'series': {}}
+
+    keep = np.ones(len(daily), dtype=bool)
+    days = daily['day'].to_numpy(dtype=object)
+    if date_from:
+        keep &= days >= date_from
+    if date_to:
+        keep &= days <= date_to
+    if categories:
+        keep &= daily['category'].isin(list(categories) + [TOTAL]).to_numpy()
+    for name, value in filters.items():
+        if value is not None:
+            if name not in daily.columns:  # rollup sin esa clave: ninguna fila puede cumplir el filtro
+                keep[:] = False
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            keep &= daily[name].isin(values).to_numpy(dtype=bool)
+
+    rows = daily[keep]
+    if rows.empty:
+        return {'granularity': granularity, 'buckets': [], 'series': {}}
+
+    if granularity == 'day':
+        bucket = rows['day']
+    else:
+        dates = pd.to_datetime(rows['day'], format='%Y-%m-%d')
+        if granularity == 'week':
+            bucket = (dates - pd.to_timedelta(dates.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+        else:
+            bucket = dates.dt.strftime('%Y-%m')
+
+    labels = bucket_labels(rows['day'].min(), rows['day'].max(), granularity)
+    grouped = rows.groupby([bucket.rename('bucket'), rows['category']])[ROLLUP_VALUES].sum()
+
+    series = {}
+    for cat, values in grouped.groupby(level='category'):
+        values = values.droplevel('category').reindex(labels, fill_value=0)
+        counts = values['count'].astype(int).tolist()
+        sentiment = [round(s / n, 4) if n else None
+                     for s, n in zip(values['sentiment_sum'], values['sentiment_count'])]
+        series[cat] = {'total': int(sum(counts)), 'counts': counts, 'sentiment': sentiment}
+
+    order = sorted(series, key=lambda c: (c != TOTAL, c == UNCATEGORIZED, -series[c]['total'], c))
+    return {'granularity': granularity, 'buckets': labels, 'series': {c: series[c] for c in order}}
+
+
+class StoreRollups:
+    """
+    Rollups diarios de un ReviewStore, mantenidos de forma incremental en disco.
+
+    <raíz>/<nombre>/rollups.parquet   rollup diario por source, review_language y rating
+    <raíz>/<nombre>/files.json        archivos del almacén ya incorporados
+
+    Como el almacén nunca reescribe sus archivos, refresh sólo categoriza los
+    archivos nuevos y suma su rollup al existente. Si un archivo incorporado
+    cambia o desaparece, el rollup se recalcula desde cero.
+    """
+
+    def __init__(self, store, root):
+        self.store = store
+        self.root = os.path.abspath(root)
+        self._loaded = {}  # nombre -> (archivos incorporados, rollup)
+        self._lock = threading.Lock()
+
+    def _load(self, name):
+        if name in self._loaded:
+            return self._loaded[name]
+
+        directory = os.path.join(self.root, name)
+        state_path, rollup_path = os.path.join(directory, ROLLUP_STATE), os.path.join(directory, ROLLUP_FILE)
+        if os.path.exists(state_path) and os.path.exists(rollup_path):
+            with open(state_path, encoding='utf-8') as fh:
+                return json.load(fh)['files'], pd.read_parquet(rollup_path)
+        return {}, None
+
+    def _save(self, name, files, rollup):
+        # Escritura atómica: archivos temporales + os.replace
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory, exist_ok=True)
+        tmp = f".tmp-{uuid.uuid4().hex}"
+        rollup.to_parquet(os.path.join(directory, ROLLUP_FILE + tmp), index=False)
+        with open(os.path.join(directory, ROLLUP_STATE + tmp), 'w', encoding='utf-8') as fh:
+            json.dump({'files': files}, fh)
+        os.replace(os.path.join(directory, ROLLUP_FILE + tmp), os.path.join(directory, ROLLUP_FILE))
+        os.replace(os.path.join(directory, ROLLUP_STATE + tmp), os.path.join(directory, ROLLUP_STATE))
+
+    def refresh(self, name, matcher, sentiment_engine=None):
+        """
+        Rollup al día del almacén categorizado con `matcher` (nombre: idioma + diccionario).
+        Devuelve (rollup, filas incorporadas en esta llamada).
+        """
+        with self._lock:
+            folded, rollup = self._load(name)
+            current = self.store.files()
+            if any(current.get(path) != version for path, version in folded.items()):
+                folded, rollup = {}, None
+
+            new_files = sorted(path for path in current if path not in folded)
+            added = 0
+            if new_files or rollup is None:
+                df = self.store.read_files(new_files, ['Subject', 'Date', 'Rating', 'Sentiment', 'source', 'language'])
+                subjects = df['Subject'].fillna("").astype(str)
+                masks = matcher.categorize(normalize_series(subjects))['category_mask']
+
+                # Sentimiento guardado (tellapart.py) o, si falta, calculado sobre el asunto
+                sentiment = pd.to_numeric(df['Sentiment'], errors='coerce')
+                if sentiment_engine is not None and sentiment.isna().any():
+                    missing = sentiment.isna()
+                    sentiment[missing] = sentiment_engine.score_series(subjects[missing])['score']
+
+                part = daily_rollup(df['Date'], masks, matcher.category_bits, sentiment,
+                                    keys={'source': df['source'], 'review_language': df['language'], 'rating': df['Rating']})
+                rollup = merge_rollups([rollup, part], keys=STORE_KEYS)
+                folded = {**folded, **{path: current[path] for path in new_files}}
+                self._save(name, folded, rollup)
+                added = len(df)
+
+            self._loaded[name] = (folded, rollup)
+            return rollup, added
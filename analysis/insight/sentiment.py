@@ -0,0 +1,76 @@
+"""
+Motor de sentimiento vectorizado para tellapart.py.
+
+Cada léxico {termino: peso} se compila UNA vez en una sola expresión con
+límites de palabra; una pasada por texto devuelve todos los términos
+presentes y el puntaje, en lugar de una búsqueda regex por término.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class SentimentEngine:
+    """
+    Léxico compilado. Misma semántica que la versión término a término:
+    texto en minúsculas, cada término cuenta una vez si aparece como palabra
+    (o frase) completa, y el puntaje es la suma de sus pesos.
+    """
+
+    def __init__(self, lexicon):
+        self.weights = dict(lexicon)
+        terms = sorted(self.weights, key=len, reverse=True)  # el más largo gana en cada posición
+
+        # Un término largo implica los términos que contiene como palabras completas
+        # (ej: 'nie wieder' contiene 'wieder' si ambos estuvieran en el léxico)
+        self._implied = {
+            term: frozenset(other for other in terms if re.search(r'\b' + re.escape(other) + r'\b', term))
+            for term in terms
+        }
+
+        # Lookahead: se prueba en cada posición sin consumir texto (detecta términos solapados)
+        self._regex = re.compile(r'(?=\b(' + '|'.join(re.escape(t) for t in terms) + r')\b)') if terms else None
+
+    def find_terms(self, text):
+        """Conjunto de términos del léxico presentes en el texto."""
+        if not isinstance(text, str) or self._regex is None:
+            return frozenset()
+
+        found = set()
+        for term in set(self._regex.findall(text.lower())):
+            found |= self._implied[term]
+        return frozenset(found)
+
+    def score(self, text):
+        return sum(self.weights[t] for t in self.find_terms(text))
+
+    def score_series(self, series, flag_terms=()):
+        """
+        Puntúa una Serie completa. Devuelve un DataFrame con el mismo índice y columnas:
+          - 'score': suma de pesos (int)
+          - 'terms': términos encontrados (frozenset)
+          - 'has_<termino>': una columna booleana por cada término de flag_terms
+        """
+        values = series.fillna("").astype(str)
+        scores = np.zeros(len(values), dtype=np.int64)
+        terms = [None] * len(values)
+
+        # Textos repetidos (asuntos típicos) se resuelven una sola vez
+        resolved = {}
+        for i, text in enumerate(values):
+            entry = resolved.get(text)
+            if entry is None:
+                found = self.find_terms(text)
+                entry = resolved[text] = (sum(self.weights[t] for t in found), found)
+            scores[i], terms[i] = entry
+
+        result = pd.DataFrame({'score': scores, 'terms': terms}, index=series.index)
+        for flag in flag_terms:
+            result[f'has_{flag}'] = np.fromiter((flag in t for t in terms), dtype=bool, count=len(terms))
+        return result
+
+
+def build_engines(lexicons):
+    """Compila un SentimentEngine por idioma: {idioma: SentimentEngine}."""
+    return {lang: SentimentEngine(lexicon) for lang, lexicon in lexicons.items()}
@@ -1,12 +1,27 @@
-import pandas as pd
-import io
-import re
+import argparse
+import multiprocessing
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+from csv_loader import CHUNK_ROWS, CSVLoadError, iter_csv_chunks, load_csv
+from executor import shard_frame
+from near_duplicates import NearDuplicateIndex
+from normalizer import normalize_series
+from review_store import ReviewStore, to_store_frame
+from sentiment import build_engines
 
 # --- CONFIGURACIÓN ---
 INPUT_FILE = "Kundenemails-deutsch_5000.csv"
 OUTPUT_POS = "reviews_positivas_asunto.csv"
 OUTPUT_NEG = "reviews_negativas_asunto.csv"
+OUTPUT_FORMATS = ['csv', 'parquet']
+DEDUPE_MODES = ['drop', 'mark']
+SHARD_ROWS = 20000
 
 # Diccionarios de Sentimiento
 SENTIMENT_LEXICON = {
@@ -36,43 +51,49 @@ SENTIMENT_LEXICON = {
     }
 }
 
+# Léxicos compilados una sola vez (una expresión por idioma)
+SENTIMENT_ENGINES = build_engines(SENTIMENT_LEXICON)
+
 def load_dataset(filepath):
-    """Carga el CSV usando lógica robusta."""
+    """Carga el CSV con el cargador compartido (un solo parseo), o un almacén Parquet si es un directorio."""
     if not os.path.exists(filepath):
         print(f"❌ Error: No se encuentra el archivo {filepath}")
         return None
 
-    separators = [';', ',', '\t']
-    df = None
-    
+    if os.path.isdir(filepath):
+        start = time.perf_counter()
+        df = ReviewStore(filepath).read(['Subject', 'Review', 'Date', 'Rating'])
+        print(f"⏱️ Almacén Parquet leído en {(time.perf_counter() - start) * 1000:.1f} ms ({len(df)} filas)")
+        return df
+
     try:
-        df = pd.read_csv(filepath, sep=None, engine='python', encoding='utf-8', dtype=str)
-    except:
-        pass
+        df, info = load_csv(filepath)
+    except CSVLoadError as e:
+        print(f"❌ Error: {e}")
+        return None
 
-    if df is None or len(df.columns) < 2:
-        for sep in separators:
-            try:
-                temp_df = pd.read_csv(filepath, sep=sep, encoding='utf-8', dtype=str)
-                if len(temp_df.columns) > 1:
-                    df = temp_df
-                    break
-            except:
-                try:
-                    temp_df = pd.read_csv(filepath, sep=sep, encoding='latin-1', dtype=str)
-                    if len(temp_df.columns) > 1:
-                        df = temp_df
-                        break
-                except:
-                    continue
+    print(f"⏱️ CSV leído en {info['sniff_ms'] + info['parse_ms']:.1f} ms "
+          f"(sep={info['sep']!r}, {info['encoding']}, motor {info['engine']})")
     return df
 
 def detect_columns(df):
     """Encuentra automáticamente las columnas de texto."""
-    cols = {'subj': None, 'body': None}
+    cols = {'subj': None, 'body': None, 'date': None, 'rating': None}
     
-    possible_body = ["Contenido", "Content", "Inhalt", "Message", "Body"]
+    possible_body = ["Contenido", "Content", "Inhalt", "Message", "Body", "Review", "Reseña"]
     possible_subj = ["Asunto", "Subject", "Betreff", "Title"]
+    possible_date = ["Fecha", "Date", "Datum"]
+    possible_rating = ["Calificación", "Rating", "Bewertung"]
+
+    for c in possible_date:
+        if c in df.columns:
+            cols['date'] = c
+            break
+
+    for c in possible_rating:
+        if c in df.columns:
+            cols['rating'] = c
+            break
 
     for c in possible_body:
         if c in df.columns:
@@ -91,19 +112,165 @@ def calculate_sentiment_score(text, lang='de'):
     if not isinstance(text, str):
         return 0
     
-    text = text.lower()
-    score = 0
-    lexicon = SENTIMENT_LEXICON.get(lang, SENTIMENT_LEXICON['de'])
-    
-    for word, weight in lexicon.items():
-        if re.search(r'\b' + re.escape(word) + r'\b', text):
-            score += weight
-            
-    return score
+    engine = SENTIMENT_ENGINES.get(lang, SENTIMENT_ENGINES['de'])
+    return engine.score(text)
+
+def score_subjects(subjects, lang='de'):
+    """
+    Puntúa una Serie de asuntos y devuelve (puntajes, es_positivo) como arrays.
+    También es la tarea de los procesos del pool: sólo viajan la columna y dos arrays.
+    """
+    # Solo tomamos el texto del asunto para el análisis (toda la columna de una vez)
+    # y buscamos 'lob' en la misma pasada
+    engine = SENTIMENT_ENGINES.get(lang, SENTIMENT_ENGINES['de'])
+    scores = engine.score_series(subjects, flag_terms=('lob',))
+
+    # Lógica: Positivo si score > 0 O si el asunto dice "lob"
+    is_positive = (scores['score'] > 0) | scores['has_lob']
+    return scores['score'].to_numpy(), is_positive.to_numpy()
+
+def apply_scores(df, scores, is_positive):
+    """
+    Guardamos todo el registro (incluido el cuerpo) pero clasificamos por el asunto.
+    Devuelve (positivos, negativos).
+    """
+    df = df.assign(sentiment_score_subject=scores)
+    return df[is_positive], df[~is_positive]
+
+def split_by_sentiment(df, subj_col, lang='de'):
+    """Puntúa el asunto de cada fila y devuelve (positivos, negativos)."""
+    return apply_scores(df, *score_subjects(df[subj_col], lang))
+
+def mark_near_duplicates(df, cols, index):
+    """
+    Añade a cada fila su cluster de casi duplicados (asunto + cuerpo normalizados):
+    'duplicate_cluster' es la fila del archivo (desde 0) que abrió el cluster e
+    'is_duplicate' indica si la fila repite otra anterior.
+    El índice LSH se comparte entre bloques: detecta repeticiones en todo el archivo.
+    """
+    texts = df[cols['subj']].fillna("").astype(str)
+    if cols['body']:
+        texts = texts + " " + df[cols['body']].fillna("").astype(str)
+
+    first_row = index.rows
+    clusters = index.add(normalize_series(texts))
+    return df.assign(duplicate_cluster=clusters, is_duplicate=clusters != first_row + np.arange(len(df)))
+
+def drop_near_duplicates(df, cols, index):
+    """Quita las filas casi duplicadas de otras ya vistas. Devuelve (filas únicas, filas quitadas)."""
+    keep = ~mark_near_duplicates(df, cols, index)['is_duplicate'].to_numpy()
+    return df[keep], int(len(df) - keep.sum())
+
+def dedupe_rows(df, cols, index, mode):
+    """
+    Deduplicación de un bloque según el modo: 'drop' quita las repeticiones y 'mark'
+    las conserva con las columnas de cluster. Devuelve (bloque, filas repetidas).
+    """
+    if mode == 'mark':
+        df = mark_near_duplicates(df, cols, index)
+        return df, int(df['is_duplicate'].sum())
+    return drop_near_duplicates(df, cols, index)
+
+def make_pool(workers):
+    """Pool de procesos para puntuar fragmentos ('spawn', como el pool del API)."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def submit_scoring(pool, subjects, shard_rows, lang='de'):
+    """Reparte los asuntos en fragmentos y los envía al pool. Devuelve los futures en orden."""
+    return [pool.submit(score_subjects, shard, lang) for shard in shard_frame(subjects, shard_rows)]
+
+def gather_scores(futures):
+    """Une los resultados de submit_scoring en el orden original de las filas."""
+    results = [f.result() for f in futures]
+    if len(results) == 1:
+        return results[0]
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+def output_path(path, fmt):
+    """Ruta de salida con la extensión del formato elegido."""
+    return path if fmt == 'csv' else os.path.splitext(path)[0] + '.' + fmt
+
+class SplitWriter:
+    """
+    Escribe un archivo de salida por partes: el primer bloque crea el archivo
+    (con cabecera/BOM en CSV) y los siguientes se añaden al final. El archivo
+    sólo se crea si llega al menos una fila, como en el modo en memoria.
+    """
+
+    def __init__(self, path, fmt='csv'):
+        self.path = output_path(path, fmt)
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, df):
+        if df.empty:
+            return
+        if self.fmt == 'parquet':
+            self._write_parquet(df)
+        elif self.rows == 0:
+            df.to_csv(self.path, index=False, sep=';', encoding='utf-8-sig')
+        else:
+            df.to_csv(self.path, mode='a', header=False, index=False, sep=';', encoding='utf-8')
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        import pyarrow as pa  # dependencia opcional, sólo para --format parquet
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table.cast(self._parquet.schema))
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+class StoreWriter:
+    """Añade las filas puntuadas (positivas y negativas) a un almacén Parquet de reseñas."""
+
+    def __init__(self, root, cols, source, language='de'):
+        self.store = ReviewStore(root)
+        self.columns = {'Subject': cols['subj'], 'Review': cols['body'], 'Date': cols['date'],
+                        'Rating': cols['rating'], 'Sentiment': 'sentiment_score_subject'}
+        self.source = source
+        self.language = language
+        self.rows = 0
+
+    def write(self, df):
+        self.rows += self.store.write(to_store_frame(df, self.columns), self.source, self.language)
+
+def report(pos, neg, store=None, duplicates=None, dedupe='drop'):
+    print("-" * 30)
+    if duplicates is not None:
+        if dedupe == 'mark':
+            print(f"🧬 Marcados {duplicates} registros casi duplicados (columnas duplicate_cluster / is_duplicate)")
+        else:
+            print(f"🧬 Descartados {duplicates} registros casi duplicados")
+
+    # Guardar Positivos
+    if pos.rows:
+        print(f"🌞 Guardados {pos.rows} positivos en '{pos.path}'")
+    else:
+        print("❄️ No se encontraron correos positivos en el asunto.")
+
+    # Guardar Negativos
+    if neg.rows:
+        print(f"🌧️ Guardados {neg.rows} negativos/neutrales en '{neg.path}'")
+
+    if store is not None:
+        print(f"🗄️ Añadidos {store.rows} registros al almacén '{store.store.root}'")
 
-def main():
-    print(f"📂 Cargando {INPUT_FILE}...")
-    df = load_dataset(INPUT_FILE)
+def run_in_memory(input_file, fmt='csv', workers=0, shard_rows=SHARD_ROWS, store_root=None, source='emails',
+                  dedupe=None):
+    """
+    Modo por defecto: carga el archivo completo y lo separa de una vez.
+    dedupe: 'drop' descarta los casi duplicados, 'mark' los marca (None = nada).
+    """
+    print(f"📂 Cargando {input_file}...")
+    df = load_dataset(input_file)
     
     if df is None:
         return
@@ -114,49 +281,169 @@ def main():
         return
 
     print(f"✅ Analizando SOLO la columna: '{cols['subj']}'")
-    
-    pos_rows = []
-    neg_rows = []
-    
+
+    duplicates = None
+    if dedupe:
+        df, duplicates = dedupe_rows(df, cols, NearDuplicateIndex(), dedupe)
+
     total = len(df)
     print(f"🧠 Analizando {total} registros...")
 
-    for index, row in df.iterrows():
-        # --- MODIFICACIÓN CLAVE ---
-        # Solo tomamos el texto del asunto para el análisis
-        text_to_analyze = str(row[cols['subj']])
-        
-        # Calculamos score solo sobre el asunto
-        score = calculate_sentiment_score(text_to_analyze, lang='de')
-        
-        # Buscamos 'lob' solo en el asunto
-        has_lob = re.search(r'\blob\b', text_to_analyze.lower())
-        
-        # Guardamos todo el registro (incluido el cuerpo) pero clasificamos por el asunto
-        row_dict = row.to_dict()
-        row_dict['sentiment_score_subject'] = score
-        
-        # Lógica: Positivo si score > 0 O si el asunto dice "lob"
-        if score > 0 or has_lob:
-            pos_rows.append(row_dict)
-        else:
-            neg_rows.append(row_dict)
+    if workers > 0:
+        print(f"⚙️ {workers} procesos, fragmentos de {shard_rows} filas")
+        with make_pool(workers) as pool:
+            scores, is_positive = gather_scores(submit_scoring(pool, df[cols['subj']], shard_rows))
+        df_pos, df_neg = apply_scores(df, scores, is_positive)
+    else:
+        df_pos, df_neg = split_by_sentiment(df, cols['subj'])
 
-    df_pos = pd.DataFrame(pos_rows)
-    df_neg = pd.DataFrame(neg_rows)
+    pos, neg = SplitWriter(OUTPUT_POS, fmt), SplitWriter(OUTPUT_NEG, fmt)
+    store = StoreWriter(store_root, cols, source) if store_root else None
+    try:
+        pos.write(df_pos)
+        neg.write(df_neg)
+        if store is not None:
+            store.write(df_pos)
+            store.write(df_neg)
+    finally:
+        pos.close()
+        neg.close()
+    report(pos, neg, store, duplicates, dedupe)
 
-    print("-" * 30)
-    # Guardar Positivos
-    if not df_pos.empty:
-        df_pos.to_csv(OUTPUT_POS, index=False, sep=';', encoding='utf-8-sig')
-        print(f"🌞 Guardados {len(df_pos)} positivos en '{OUTPUT_POS}'")
-    else:
-        print("❄️ No se encontraron correos positivos en el asunto.")
+def open_chunks(input_file, chunk_rows, stack):
+    """
+    Bloques de entrada para el modo streaming: (iterador de DataFrames, progreso(), descripción).
+    Un directorio se lee como almacén Parquet (por lotes); cualquier otro archivo como CSV.
+    """
+    if os.path.isdir(input_file):
+        store = ReviewStore(input_file)
+        total = store.scanner(['Subject']).count_rows()  # sólo metadatos, no lee las filas
+        read = 0
 
-    # Guardar Negativos
-    if not df_neg.empty:
-        df_neg.to_csv(OUTPUT_NEG, index=False, sep=';', encoding='utf-8-sig')
-        print(f"🌧️ Guardados {len(df_neg)} negativos/neutrales en '{OUTPUT_NEG}'")
+        def batches():
+            nonlocal read
+            for batch in store.iter_batches(['Subject', 'Review', 'Date', 'Rating'], chunk_rows):
+                read += len(batch)
+                yield batch
+
+        return batches(), lambda: read / total if total else 1.0, "almacén Parquet"
+
+    size = os.path.getsize(input_file)
+    fh = stack.enter_context(open(input_file, 'rb'))
+    dialect, reader = iter_csv_chunks(fh, chunk_rows)
+    # Progreso aproximado: el lector de pandas lee por delante en su búfer
+    progress = lambda: min(fh.tell() / size, 1.0) if size else 1.0
+    return reader, progress, f"sep={dialect['sep']!r}, {dialect['encoding']}"
+
+def run_streaming(input_file, chunk_rows=CHUNK_ROWS, fmt='csv', workers=0, shard_rows=SHARD_ROWS,
+                  store_root=None, source='emails', dedupe=None):
+    """
+    Modo por bloques para volcados de varios GB: lee `chunk_rows` filas cada vez,
+    las puntúa y las añade a las salidas. La memoria queda acotada por el bloque.
+    Con workers > 0 los bloques se puntúan en el pool mientras se lee el siguiente
+    (como mucho workers + 1 bloques en vuelo) y se escriben en el orden de lectura.
+    """
+    if not os.path.exists(input_file):
+        print(f"❌ Error: No se encuentra el archivo {input_file}")
+        return
+
+    print(f"📂 Procesando {input_file} por bloques de {chunk_rows} filas...")
+
+    pos, neg = SplitWriter(OUTPUT_POS, fmt), SplitWriter(OUTPUT_NEG, fmt)
+    # Salidas de una ejecución anterior: se reemplazan, no se les añade nada
+    for writer in (pos, neg):
+        if os.path.exists(writer.path):
+            os.remove(writer.path)
+
+    pool = make_pool(workers) if workers > 0 else None
+    pending = deque()  # (bloque, futures o puntajes) en orden de lectura
+    store = None
+    progress = None
+    dedupe_index = NearDuplicateIndex() if dedupe else None
+    duplicates = 0 if dedupe else None
+    start = time.perf_counter()
+    total = 0
+
+    def flush(limit):
+        nonlocal total
+        while len(pending) > limit:
+            chunk, scored = pending.popleft()
+            df_pos, df_neg = apply_scores(chunk, *(gather_scores(scored) if pool else scored))
+            pos.write(df_pos)
+            neg.write(df_neg)
+            if store is not None:
+                store.write(df_pos)
+                store.write(df_neg)
+            total += len(chunk)
+
+            rate = total / max(time.perf_counter() - start, 1e-9)
+            sys.stdout.write(f"\r🧠 {total} registros ({progress():.0%}, {rate:,.0f} filas/s)")
+            sys.stdout.flush()
+
+    try:
+        with ExitStack() as stack:
+            try:
+                reader, progress, description = open_chunks(input_file, chunk_rows, stack)
+            except CSVLoadError as e:
+                print(f"❌ Error: {e}")
+                return
+
+            subj_col = None
+            for chunk in reader:
+                if subj_col is None:
+                    cols = detect_columns(chunk)
+                    subj_col = cols['subj']
+                    if not subj_col:
+                        print("❌ No se encontró columna de Asunto (Betreff/Subject).")
+                        return
+                    print(f"✅ Analizando SOLO la columna: '{subj_col}' ({description})")
+                    if store_root:
+                        store = StoreWriter(store_root, cols, source)
+
+                if dedupe_index is not None:
+                    chunk, repeated = dedupe_rows(chunk, cols, dedupe_index, dedupe)
+                    duplicates += repeated
+
+                if pool is None:
+                    pending.append((chunk, score_subjects(chunk[subj_col])))
+                else:
+                    pending.append((chunk, submit_scoring(pool, chunk[subj_col], shard_rows)))
+                flush(workers)
+
+            flush(0)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        pos.close()
+        neg.close()
+
+    print()
+    report(pos, neg, store, duplicates, dedupe)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Separa correos positivos y negativos según el asunto.")
+    parser.add_argument("--input", default=INPUT_FILE, help="CSV de entrada o directorio de un almacén Parquet de reseñas")
+    parser.add_argument("--chunk-rows", type=int, default=0,
+                        help=f"Procesar por bloques de N filas con memoria constante (ej: {CHUNK_ROWS}); 0 = todo en memoria")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de salida (parquet requiere pyarrow)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help=f"Procesos para puntuar en paralelo (ej: {os.cpu_count() or 1}); 0 = en este proceso")
+    parser.add_argument("--shard-size", type=int, default=SHARD_ROWS,
+                        help="Filas por fragmento enviado a cada proceso")
+    parser.add_argument("--store", default=None,
+                        help="Además, añadir todos los registros puntuados a este almacén Parquet de reseñas")
+    parser.add_argument("--source", default='emails', help="Partición 'source' al escribir en el almacén")
+    parser.add_argument("--dedupe", nargs='?', const='drop', choices=DEDUPE_MODES, default=None,
+                        help="Correos casi duplicados (reenvíos o ligeras ediciones): 'drop' (por defecto) los "
+                             "descarta antes de separar; 'mark' los conserva con su cluster en columnas extra")
+    args = parser.parse_args(argv)
+
+    if args.chunk_rows > 0:
+        run_streaming(args.input, args.chunk_rows, args.format, args.workers, args.shard_size, args.store, args.source,
+                      args.dedupe)
+    else:
+        run_in_memory(args.input, args.format, args.workers, args.shard_size, args.store, args.source, args.dedupe)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,89 @@
+"""Validación de parámetros del API (con un almacén y rollups vacíos en un directorio temporal)."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pyarrow")
+
+_TMP = tempfile.mkdtemp(prefix="insight-test-")
+os.environ.update(INSIGHT_WORKERS="0", INSIGHT_DICTIONARY_POLL="0",
+                  INSIGHT_STORE_DIR=os.path.join(_TMP, "store"), INSIGHT_ROLLUP_DIR=os.path.join(_TMP, "rollups"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient  # noqa: E402
+import insight  # noqa: E402
+
+BAD_DATES = ["bad", "2024-1-5", "2024-13-01", "2024-02-30", "05/01/2024"]
+REVIEWS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "notebooks",
+                       "OBB_Reviews_Completo_TP.csv")
+FORM = {"type": "true", "col_msg": "Reseña", "language": "de"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(insight.app)
+
+
+@pytest.mark.parametrize("path", ["/almacen/", "/almacen/tendencias"])
+@pytest.mark.parametrize("param", ["date_from", "date_to"])
+@pytest.mark.parametrize("value", BAD_DATES)
+def test_store_rejects_bad_dates(client, path, param, value):
+    response = client.get(path, params={param: value})
+    assert response.status_code == 400
+    assert param in response.json()["detail"]
+
+
+@pytest.mark.parametrize("path", ["/almacen/", "/almacen/tendencias"])
+def test_store_accepts_iso_dates(client, path):
+    response = client.get(path, params={"date_from": "2024-01-05", "date_to": "2024-12-31"})
+    assert response.status_code == 200
+
+
+@pytest.fixture(scope="module")
+def dataset_id(client):
+    with open(REVIEWS, "rb") as fh:
+        response = client.post("/analizar/", files={"file": ("reviews.csv", fh.read())}, data=FORM)
+    assert response.status_code == 200
+    return response.json()["dataset_id"]
+
+
+@pytest.mark.parametrize("param", ["date_from", "date_to"])
+@pytest.mark.parametrize("value", BAD_DATES)
+def test_dataset_rejects_bad_dates(client, dataset_id, param, value):
+    assert client.get(f"/analizar/{dataset_id}", params={param: value}).status_code == 400
+    assert client.get(f"/analizar/{dataset_id}/tendencias", params={param: value}).status_code == 400
+    with open(REVIEWS, "rb") as fh:
+        response = client.post("/analizar/", files={"file": ("reviews.csv", fh.read())}, data={**FORM, param: value})
+    assert response.status_code == 400
+
+
+def test_date_filter(client, dataset_id):
+    rows = client.get(f"/analizar/{dataset_id}", params={"date_from": "2025-01-01", "limit": 1000}).json()["data"]
+    assert rows and all(row["date"] >= "2025-01-01" for row in rows)
+
+
+def test_keyword_filter_matches_keywords_found(client, dataset_id):
+    every = client.get(f"/analizar/{dataset_id}", params={"limit": 1000}).json()["data"]
+    terms = {term for row in every for found in row["keywords_found"].values() for term in found}
+    assert terms
+    for term in terms:
+        expected = [row["row_id"] for row in every
+                    if any(term in found for found in row["keywords_found"].values())]
+        response = client.get(f"/analizar/{dataset_id}", params={"keyword": term, "limit": 1000})
+        assert [row["row_id"] for row in response.json()["data"]] == expected
+
+
+@pytest.mark.parametrize("path", ["", "/exportar"])
+def test_dedupe_takes_an_executor_slot(client, dataset_id, monkeypatch, path):
+    dataset = insight.DATASET_CACHE.get(dataset_id)
+    monkeypatch.setattr(dataset, "duplicates", None)
+    # Cola llena: ningún turno libre y nadie más puede esperar
+    monkeypatch.setattr(insight.EXECUTOR, "max_concurrency", 0)
+    monkeypatch.setattr(insight.EXECUTOR, "queue_depth", 0)
+    monkeypatch.setattr(insight.EXECUTOR, "_semaphore", None)
+    assert client.get(f"/analizar/{dataset_id}{path}", params={"dedupe": "true"}).status_code == 503
+    # Sin dedupe no hace falta turno
+    assert client.get(f"/analizar/{dataset_id}{path}").status_code == 200
@@ -0,0 +1,89 @@
+"""Caché de datasets: las vistas perezosas cuentan para el límite de memoria y se calculan una vez."""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_cache import FILTERED_VIEWS, CachedDataset, DatasetCache, view_bytes  # noqa: E402
+
+ROWS = 1000
+
+
+def make_dataset():
+    df = pd.DataFrame({'Asunto': [f"asunto {i}" for i in range(ROWS)], 'Contenido': ["texto"] * ROWS})
+    shared = [{}, {'service': ['karte']}]
+    categories = pd.DataFrame({'category_mask': np.arange(ROWS) % 2,
+                               'keywords_found': [shared[i % 2] for i in range(ROWS)]})
+    return CachedDataset(df, categories, None, [], {'subj': 'Asunto', 'msg': 'Contenido', 'date': None}, 'es', True)
+
+
+def test_lazy_views_grow_entry_and_cache():
+    cache = DatasetCache(max_entries=4, max_bytes=10 ** 9)
+    dataset = make_dataset()
+    cache.put('a', dataset)
+    base = dataset.nbytes
+
+    view = pd.DataFrame({'cluster': np.arange(ROWS)})
+    dataset.lazy('duplicates', lambda: view)
+    assert dataset.nbytes == base + view_bytes(view)
+    assert cache.stats()['bytes'] == dataset.nbytes
+
+    codes, groups = dataset.keyword_codes()
+    assert len(groups) == 2 and codes.tolist() == [i % 2 for i in range(ROWS)]
+    assert cache.stats()['bytes'] == dataset.nbytes == base + view_bytes(view) + view_bytes((codes, groups))
+
+
+def test_filtered_views_are_accounted_and_evicted():
+    cache = DatasetCache(max_entries=4, max_bytes=10 ** 9)
+    dataset = make_dataset()
+    cache.put('a', dataset)
+    base = dataset.nbytes
+
+    for i in range(FILTERED_VIEWS + 3):
+        dataset.filter_positions(str(i), lambda i=i: np.arange(ROWS) % (i + 2) == 0)
+    kept = sum(view_bytes(entry) for entry in dataset.filtered.values())
+    assert len(dataset.filtered) == FILTERED_VIEWS
+    assert dataset.nbytes == base + kept
+    assert cache.stats()['bytes'] == dataset.nbytes
+    assert not dataset._locks  # los locks de las vistas filtradas no se acumulan
+
+
+def test_growing_view_evicts_older_entries():
+    first, second = make_dataset(), make_dataset()
+    cache = DatasetCache(max_entries=4, max_bytes=first.nbytes + second.nbytes + 100)
+    cache.put('first', first)
+    cache.put('second', second)
+    assert cache.stats()['entries'] == 2
+
+    second.lazy('rollup', lambda: pd.DataFrame({'count': np.zeros(100, dtype=np.int64)}))
+    assert cache.get('first') is None
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == second.nbytes
+
+    # Una vez fuera de la caché, sus vistas ya no cuentan para el total
+    first.lazy('rollup', lambda: pd.DataFrame({'count': np.zeros(100, dtype=np.int64)}))
+    assert cache.stats()['bytes'] == second.nbytes
+
+
+def test_lazy_view_is_computed_once_under_concurrency():
+    dataset = make_dataset()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return pd.DataFrame({'cluster': np.arange(ROWS)})
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dataset.lazy('duplicates', compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,55 @@
+"""Rollups diarios y agrupación por buckets, incluido el almacén vacío."""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dictionaries import DICTIONARY_DIR, DictionaryRegistry  # noqa: E402
+from normalizer import normalize_text  # noqa: E402
+from review_store import ReviewStore  # noqa: E402
+from rollups import STORE_KEYS, StoreRollups, bucket_rollup, daily_rollup  # noqa: E402
+
+EMPTY = {'granularity': 'month', 'buckets': [], 'series': {}}
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return DictionaryRegistry(DICTIONARY_DIR, normalize_text).current().get_matcher('de', True)
+
+
+def test_empty_rollup_keeps_key_columns(matcher):
+    daily = daily_rollup([], [], matcher.category_bits, keys={name: [] for name in STORE_KEYS})
+    assert daily.empty
+    assert set(STORE_KEYS) <= set(daily.columns)
+
+
+@pytest.mark.parametrize("filters", [{}, {'rating': [1]}, {'source': 'trustpilot'}, {'review_language': 'de'}])
+def test_empty_store_trends(tmp_path, matcher, filters):
+    rollups = StoreRollups(ReviewStore(str(tmp_path / "store")), str(tmp_path / "rollups"))
+    daily, added = rollups.refresh("de-resumido", matcher)
+    assert added == 0
+    assert bucket_rollup(daily, 'month', **filters) == EMPTY
+
+    # El rollup vacío guardado en disco también conserva las claves
+    reloaded, _ = StoreRollups(rollups.store, rollups.root).refresh("de-resumido", matcher)
+    assert set(STORE_KEYS) <= set(reloaded.columns)
+    assert bucket_rollup(reloaded, 'month', **filters) == EMPTY
+
+
+def test_filter_on_missing_key_matches_nothing(matcher):
+    daily = daily_rollup(['2025-01-02'], [0], matcher.category_bits)
+    assert bucket_rollup(daily, 'day')['buckets'] == ['2025-01-02']
+    assert bucket_rollup(daily, 'day', rating=[5]) == {'granularity': 'day', 'buckets': [], 'series': {}}
+
+
+def test_bucket_rollup_filters(matcher):
+    bit = next(iter(matcher.category_bits.values()))
+    daily = daily_rollup(['2025-01-02', '2025-01-20', '2025-02-03'], [bit, 0, bit], matcher.category_bits,
+                         sentiment=[1, -1, None], keys={'rating': [5, 1, 5]})
+    result = bucket_rollup(daily, 'month', rating=[5])
+    assert result['buckets'] == ['2025-01', '2025-02']
+    assert result['series']['total']['counts'] == [1, 1]
+    assert result['series']['total']['sentiment'] == [1.0, None]
@@ -1,54 +1,135 @@
-from PIL import Image, ImageDraw
-import math
+from PIL import Image, ImageColor, ImageDraw
+from concurrent.futures import ThreadPoolExecutor
+from process_icon import ICON_SIZES
+import argparse
+import hashlib
+import json
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+output_dir = os.path.join(BASE_DIR, "icons", "obb_icon")
+
+DESIGN_SIZE = 512        # Las coordenadas del diseño están en una rejilla de 512 px
+SUPERSAMPLE = 4          # Se dibuja a 4× el tamaño final y se reduce una sola vez
+RENDER_VERSION = 1       # Subir si cambia el dibujo: invalida todo lo cacheado
+CACHE_MANIFEST = ".render_cache.json"
 
-# Crear una imagen de 512×512 con fondo rojo ÖBB
-size = 512
 background_color = (220, 20, 60)  # Rojo ÖBB
-img = Image.new("RGBA", (size, size), (255, 255, 255, 0))  # Fondo transparente
-draw = ImageDraw.Draw(img)
-
-# Dibujar círculo rojo como fondo
-circle_radius = 180
-circle_center = (256, 256)
-draw.ellipse(
-    [circle_center[0] - circle_radius, circle_center[1] - circle_radius,
-     circle_center[0] + circle_radius, circle_center[1] + circle_radius],
-    fill=background_color
-)
-
-# Dibujar el símbolo ÖBB (círculo con línea)
-# Círculo blanco exterior
-outer_radius = 140
-draw.ellipse(
-    [circle_center[0] - outer_radius, circle_center[1] - outer_radius,
-     circle_center[0] + outer_radius, circle_center[1] + outer_radius],
-    outline=(255, 255, 255), width=25, fill=None
-)
-
-# Línea diagonal blanca (el "/" del logo)
-line_width = 30
-angle = 45
-start_x = circle_center[0] - 60
-start_y = circle_center[1] - 120
-end_x = circle_center[0] + 60
-end_y = circle_center[1] - 10
-
-draw.line([(start_x, start_y), (end_x, end_y)], fill=(255, 255, 255), width=line_width)
-
-# Círculo rojo interior (hueco)
-inner_radius = 95
-draw.ellipse(
-    [circle_center[0] - inner_radius, circle_center[1] - inner_radius,
-     circle_center[0] + inner_radius, circle_center[1] + inner_radius],
-    fill=(255, 255, 255, 0)
-)
-
-# Guardar la imagen
-output_path = r"C:\Users\ludwi\Documents\HACKATHON\obb_icon_new.png"
-img.save(output_path, "PNG", optimize=True)
-
-print(f"✅ Imagen ÖBB creada")
-print(f"✅ Guardada en: {output_path}")
-print(f"✅ Dimensiones: 512 × 512 px")
-print(f"✅ Fondo: Transparente")
-print(f"✅ Logo: Rojo ÖBB con símbolo blanco")
+symbol_color = (255, 255, 255)    # Símbolo blanco
+TRANSPARENT = (255, 255, 255, 0)
+
+
+def draw_obb_icon(size, background=background_color, symbol=symbol_color, supersample=SUPERSAMPLE):
+    """
+    Dibuja el logo ÖBB a size × size px directamente a ese tamaño (no reescalando
+    un raster de 512): el diseño se traza a size × supersample y se reduce una vez.
+    """
+    canvas = size * supersample
+    scale = canvas / DESIGN_SIZE
+    center = DESIGN_SIZE / 2 * scale
+
+    img = Image.new("RGBA", (canvas, canvas), TRANSPARENT)  # Fondo transparente
+    draw = ImageDraw.Draw(img)
+
+    def circle(radius, **style):
+        r = radius * scale
+        draw.ellipse([center - r, center - r, center + r, center + r], **style)
+
+    # Círculo rojo como fondo
+    circle(180, fill=background)
+
+    # Símbolo ÖBB: círculo blanco exterior
+    circle(140, outline=symbol, width=max(1, round(25 * scale)), fill=None)
+
+    # Línea diagonal blanca (el "/" del logo)
+    draw.line([(center - 60 * scale, center - 120 * scale), (center + 60 * scale, center - 10 * scale)],
+              fill=symbol, width=max(1, round(30 * scale)))
+
+    # Círculo interior (hueco transparente)
+    circle(95, fill=TRANSPARENT)
+
+    if supersample > 1:
+        img = img.resize((size, size), Image.Resampling.LANCZOS)
+    return img
+
+
+def render_key(size, background, symbol, supersample):
+    """Clave de caché de un render: cambia si cambia cualquier parámetro o el dibujo."""
+    params = {"version": RENDER_VERSION, "size": size, "background": list(background),
+              "symbol": list(symbol), "supersample": supersample}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, CACHE_MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    # Escritura atómica: un corte a medias no deja un manifiesto corrupto
+    path = os.path.join(out_dir, CACHE_MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def render_icon(size, path, background, symbol, supersample):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    draw_obb_icon(size, background, symbol, supersample).save(path, "PNG", optimize=True)
+    return path
+
+
+def render_icon_set(out_dir=output_dir, sizes=ICON_SIZES, background=background_color, symbol=symbol_color,
+                    supersample=SUPERSAMPLE, force=False, workers=None):
+    """
+    Renderiza el set de iconos en out_dir ({nombre: px}, mismos nombres que process_icon.py).
+    Sólo se dibujan los tamaños cuyo archivo falta o cuyos parámetros cambiaron desde el
+    último render (manifiesto .render_cache.json): reconstruir sin cambios no dibuja nada.
+    Devuelve {'rendered': [nombres], 'cached': [nombres]}.
+    """
+    manifest = {} if force else load_manifest(out_dir)
+    pending, cached = {}, []
+    for name, size in sizes.items():
+        key = render_key(size, background, symbol, supersample)
+        if manifest.get(name) == key and os.path.exists(os.path.join(out_dir, name + ".png")):
+            cached.append(name)
+        else:
+            pending[name] = key
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda name: render_icon(sizes[name], os.path.join(out_dir, name + ".png"),
+                                                   background, symbol, supersample), pending))
+        manifest.update(pending)
+        save_manifest(out_dir, manifest)
+
+    return {"rendered": list(pending), "cached": cached}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renderiza el icono ÖBB en todos los tamaños de la app (con caché).")
+    parser.add_argument("--out", default=output_dir, help="Carpeta de salida")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="Sólo estos tamaños en px (ej. --sizes 512 192), como icon-<px>.png")
+    parser.add_argument("--background", default="#dc143c", help="Color del círculo (ej. '#dc143c' o 'rgb(220,20,60)')")
+    parser.add_argument("--symbol", default="#ffffff", help="Color del símbolo")
+    parser.add_argument("--supersample", type=int, default=SUPERSAMPLE, help="Factor de sobremuestreo (1 = sin suavizado)")
+    parser.add_argument("--force", action="store_true", help="Ignora la caché y vuelve a dibujar todo")
+    parser.add_argument("--workers", type=int, default=None, help="Hilos del pool (por defecto, según los núcleos)")
+    args = parser.parse_args()
+
+    sizes = {f"icon-{size}": size for size in args.sizes} if args.sizes else ICON_SIZES
+
+    start = time.perf_counter()
+    result = render_icon_set(args.out, sizes, ImageColor.getrgb(args.background)[:3], ImageColor.getrgb(args.symbol)[:3],
+                             args.supersample, args.force, args.workers)
+
+    print(f"✅ Iconos ÖBB en: {args.out}")
+    print(f"✅ Dibujados: {len(result['rendered'])}, sin cambios (caché): {len(result['cached'])}")
+    print(f"✅ Tiempo: {time.perf_counter() - start:.2f} s")
+    print(f"✅ Fondo: Transparente")
+    print(f"✅ Logo: Rojo ÖBB con símbolo blanco")
@@ -1,47 +1,126 @@
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import numpy as np
 import os
+import time
 
-# Ruta de la imagen original
-input_path = r"C:\Users\ludwi\Documents\HACKATHON\unnamed.png"
-output_path = r"C:\Users\ludwi\Documents\HACKATHON\app_icon_transparent.png"
-
-# Abrir la imagen
-img = Image.open(input_path)
-
-# Obtener información
-print(f"Dimensiones originales: {img.size[0]} × {img.size[1]} px")
-print(f"Modo de color: {img.mode}")
-
-# Convertir a RGBA si no lo es
-if img.mode != "RGBA":
-    img = img.convert("RGBA")
-
-# Obtener los datos de píxeles
-data = img.getdata()
-
-# Crear una nueva lista de píxeles con fondo transparente
-# Si el píxel es rojo (fondo) lo hacemos transparente
-new_data = []
-for item in data:
-    # Detectar píxeles rojos (R > 200, G < 100, B < 100)
-    if item[0] > 200 and item[1] < 100 and item[2] < 100:
-        # Hacer transparente (establecer alfa a 0)
-        new_data.append((item[0], item[1], item[2], 0))
-    else:
-        # Mantener el píxel original
-        new_data.append(item)
-
-# Actualizar la imagen
-img.putdata(new_data)
-
-# Redimensionar a 512×512 px (tamaño maestro)
-icon_512 = img.resize((512, 512), Image.Resampling.LANCZOS)
-
-# Guardar la imagen con fondo transparente
-icon_512.save(output_path, "PNG", optimize=True)
-
-print(f"\n✅ Imagen procesada correctamente")
-print(f"✅ Guardada en: {output_path}")
-print(f"✅ Dimensiones finales: 512 × 512 px")
-print(f"✅ Fondo: Transparente")
-print(f"✅ Modo: RGBA (con canal alpha)")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imagen original por defecto y carpeta de salida
+input_path = os.path.join(BASE_DIR, "unnamed.png")
+output_dir = os.path.join(BASE_DIR, "icons")
+
+# Extensiones que se procesan cuando la entrada es una carpeta
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+# Tamaños del set de iconos: nombre de archivo (relativo a la carpeta del icono) -> lado en px.
+# Los de Android siguen la estructura de res/ del proyecto Capacitor (android/app/src/main/res)
+ICON_SIZES = {
+    "mipmap-mdpi/ic_launcher": 48,
+    "mipmap-hdpi/ic_launcher": 72,
+    "mipmap-xhdpi/ic_launcher": 96,
+    "mipmap-xxhdpi/ic_launcher": 144,
+    "mipmap-xxxhdpi/ic_launcher": 192,
+    "mipmap-mdpi/ic_launcher_foreground": 108,
+    "mipmap-hdpi/ic_launcher_foreground": 162,
+    "mipmap-xhdpi/ic_launcher_foreground": 216,
+    "mipmap-xxhdpi/ic_launcher_foreground": 324,
+    "mipmap-xxxhdpi/ic_launcher_foreground": 432,
+    "ios/AppIcon-60@2x": 120,
+    "ios/AppIcon-76@2x": 152,
+    "ios/AppIcon-83.5@2x": 167,
+    "ios/AppIcon-60@3x": 180,
+    "ios/AppIcon-1024": 1024,
+    "icon-512": 512,  # Tamaño maestro (el antiguo app_icon_transparent.png)
+}
+
+
+def make_background_transparent(img):
+    """
+    Hace transparente el fondo rojo (R > 200, G < 100, B < 100) con operaciones
+    sobre el buffer de píxeles completo, en lugar de recorrer getdata() píxel a píxel.
+    """
+    # Convertir a RGBA si no lo es
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+
+    pixels = np.array(img)  # (alto, ancho, 4) uint8, copia editable
+    r, g, b = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    background = (r > 200) & (g < 100) & (b < 100)
+    pixels[..., 3][background] = 0  # Sólo el alfa: el color se mantiene
+    return Image.fromarray(pixels, "RGBA")
+
+
+def load_master(path):
+    """Decodifica la imagen original UNA vez y devuelve el maestro con fondo transparente."""
+    with Image.open(path) as img:
+        print(f"{os.path.basename(path)}: {img.size[0]} × {img.size[1]} px, modo {img.mode}")
+        return make_background_transparent(img)
+
+
+def export_size(master, size, path):
+    """Redimensiona el maestro a size × size px y lo guarda como PNG."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    master.resize((size, size), Image.Resampling.LANCZOS).save(path, "PNG", optimize=True)
+    return path
+
+
+def collect_inputs(inputs):
+    """Archivos de imagen de la lista de entradas (las carpetas se expanden, sin recursión)."""
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            files.extend(os.path.join(entry, name) for name in sorted(os.listdir(entry))
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            files.append(entry)
+    return files
+
+
+def build_icons(inputs, out_dir, sizes=ICON_SIZES, workers=None):
+    """
+    Genera el set de iconos de cada imagen de entrada en out_dir/<nombre>/.
+    Cada original se decodifica y se enmascara una sola vez; los redimensionados y
+    el guardado de todas las imágenes y tamaños se reparten en un pool de hilos
+    (Pillow libera el GIL al redimensionar y comprimir).
+    Devuelve {original: [rutas generadas]}.
+    """
+    files = collect_inputs(inputs)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        masters = dict(zip(files, pool.map(load_master, files)))
+
+        futures = {}
+        for path, master in masters.items():
+            icon_dir = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+            futures[path] = [pool.submit(export_size, master, size, os.path.join(icon_dir, name + ".png"))
+                             for name, size in sizes.items()]
+
+        for path, path_futures in futures.items():
+            results[path] = [f.result() for f in path_futures]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fondo rojo transparente y set de iconos de la app en todos los tamaños.")
+    parser.add_argument("inputs", nargs="*", default=[input_path], help="Imágenes o carpetas de imágenes originales")
+    parser.add_argument("--out", default=output_dir, help="Carpeta de salida (una subcarpeta por imagen)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="Sólo estos tamaños en px (ej. --sizes 512 192), como icon-<px>.png")
+    parser.add_argument("--workers", type=int, default=None, help="Hilos del pool (por defecto, según los núcleos)")
+    args = parser.parse_args()
+
+    sizes = {f"icon-{size}": size for size in args.sizes} if args.sizes else ICON_SIZES
+
+    start = time.perf_counter()
+    results = build_icons(args.inputs, args.out, sizes, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for path, outputs in results.items():
+        icon_dir = os.path.join(args.out, os.path.splitext(os.path.basename(path))[0])
+        print(f"✅ {os.path.basename(path)} → {len(outputs)} iconos en {icon_dir}")
+    print(f"\n✅ {len(results)} imágenes procesadas en {elapsed:.2f} s")
+    print(f"✅ Fondo: Transparente")
+    print(f"✅ Modo: RGBA (con canal alpha)")
@@ -0,0 +1,60 @@
+"""Offline checks of the page extractors against a synthetic page that mirrors Trustpilot's review markup (no browser needed)."""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("bs4")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import web_scrapping  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "trustpilot_page.html")
+
+EXPECTED = [
+    {"date": "2025-11-22", "subject": "Pünktlich und sauber",
+     "review": "Der Railjet war pünktlich.\nSehr freundliches Personal!\nGerne wieder.", "rating": 5},
+    {"date": "2025-10-03", "subject": "Verspätung ohne Info",
+     "review": "Zug 40 Minuten zu spät, keine Durchsage.", "rating": 2},
+    {"date": "2025-09-15", "subject": "No subject", "review": "App stürzt beim Ticketkauf ab.", "rating": 1},
+    {"date": "2024-01-07", "subject": "Gute Verbindung", "review": "", "rating": 4},
+]
+
+
+@pytest.fixture(scope="module")
+def page():
+    with open(FIXTURE, encoding="utf-8") as fh:
+        return fh.read()
+
+
+def test_html_extractor(page):
+    assert web_scrapping.parse_cards_html(page) == EXPECTED
+
+
+def test_next_data_extractor(page):
+    assert web_scrapping.parse_cards_next_data(page) == EXPECTED
+
+
+def test_extractors_agree(page):
+    assert web_scrapping.parse_cards_html(page) == web_scrapping.parse_cards_next_data(page)
+
+
+def test_line_breaks(page):
+    first = web_scrapping.parse_cards_html(page)[0]
+    assert first["review"].splitlines() == ["Der Railjet war pünktlich.", "Sehr freundliches Personal!", "Gerne wieder."]
+
+
+def test_card_selector_fallback():
+    html = ('<div class="styles_reviewCard__x"><div data-service-review-rating="3"></div>'
+            '<h2 class="CDS_Typography_heading-m">Ok</h2><p class="typography_body-m">Nada especial</p></div>')
+    assert web_scrapping.parse_cards_html(html) == [
+        {"date": None, "subject": "Ok", "review": "Nada especial", "rating": 3}]
+
+
+@pytest.mark.parametrize("value, expected", [("4", 4), (5, 5), ("0", None), ("6", None), ("x", None), (None, None)])
+def test_clean_rating(value, expected):
+    assert web_scrapping.clean_rating(value) == expected
+
+
+def test_missing_next_data():
+    assert web_scrapping.parse_cards_next_data("<html><body></body></html>") == []
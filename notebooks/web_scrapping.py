@@ -1,15 +1,59 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.edge.service import Service as EdgeService
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+except ImportError:  # selenium is only needed to crawl; --parse-html works without it
+    webdriver = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # only needed by the 'html' extractor
+    BeautifulSoup = None
 
 
 RUTA_DRIVER = r"C:\Drivers\msedgedriver.exe" # declare the path to the Edge WebDriver
 BASE_URL = "https://es.trustpilot.com/review/tickets.oebb.at?languages=all" # The base URL of the Trust Pilot OBB website
+OUTPUT_FILE = "OBB_Reviews_Completo_TP.csv" # Accumulated dataset, new reviews are appended to it
+INDEX_SUFFIX = ".fingerprints" # De-dup index saved next to the output (one fingerprint per line)
+STATE_SUFFIX = ".state.json" # Newest review (date + fingerprint) per rating, for incremental runs
+RATINGS = [5, 4, 3, 2, 1] # Rating filters, in the order they are crawled and merged
+INSIGHT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "analysis", "insight") # review_store module
+CARD_SELECTOR = "article[class*='styles_reviewCard']"
+
+# Field selectors, in fallback order. Shared by the Selenium and the HTML extractors
+CARD_SELECTORS = [CARD_SELECTOR, "div[class*='styles_reviewCard']"]
+TITLE_SELECTORS = ["h2[class*='CDS_Typography_heading']", "[data-service-review-title-typography='true']"]
+BODY_SELECTORS = ["[data-service-review-text-typography='true']", "p[class*='typography_body']"]
+RATING_ATTRIBUTE = "data-service-review-rating" # stars of the card, on the star-rating element
+EXTRACTORS = ['selenium', 'html', 'json'] # how each page's cards are read (see extract_page)
+HTML_DUMP_DIR = None # if set, the HTML of every crawled page is saved there (offline fixtures)
+
+# Upper bounds (seconds) for each kind of page transition; the waits return as soon as the page is ready
+WAIT_TIMEOUTS = {
+    'load': 15,   # first load of BASE_URL
+    'filter': 10, # selecting / unselecting a rating checkbox
+    'page': 10,   # clicking 'Next'
+    'next': 5,    # finding the 'Next' button on the current page
+}
+TRANSITION_LOG = [] # (kind, seconds, signal) of every transition, summarized at the end of the run
+IDLE_POLL = 1 # seconds between checks while waiting for a driver from the pool
 
 
 def start_driver():
@@ -17,6 +61,10 @@ def start_driver():
     function to start the Edge webdriver
     :return: webdriver.Edge instance
     """
+    if webdriver is None:
+        print("Error starting driver: selenium is not installed")
+        return None
+
     options = webdriver.EdgeOptions() # Instatiate Edge options
     options.add_argument('--headless') # Run in headless mode
 
@@ -30,6 +78,137 @@ def start_driver():
         return None
 
 
+class DriverPool:
+    """
+    Bounded pool of headless Edge drivers for the parallel mode.
+    Drivers are started on demand (never more than `size`) and reused between ratings.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.Queue()
+        self._started = []
+        self._reserved = 0 # drivers started or being started
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # The slot is reserved under the lock, so concurrent borrowers never start more than `size`
+        with self._lock:
+            can_start = self._reserved < self.size
+            if can_start:
+                self._reserved += 1
+        if can_start:
+            driver = start_driver()
+            if driver is not None:
+                with self._lock:
+                    self._started.append(driver)
+                return driver
+            with self._lock:
+                self._reserved -= 1 # failed start: free the slot and wait for another worker's driver
+
+        # Wait for a driver to be returned, as long as one exists or is being started
+        while True:
+            try:
+                return self._idle.get(timeout=IDLE_POLL)
+            except queue.Empty:
+                with self._lock:
+                    if not self._reserved:
+                        return None
+
+    @contextmanager
+    def driver(self):
+        """Borrows an idle driver (or starts a new one). Yields None only if no driver could be started at all."""
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            if driver is not None:
+                self._idle.put(driver)
+
+    def close(self):
+        for driver in self._started:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._started = []
+        self._reserved = 0
+
+
+def first_card(driver):
+    """First review card on the page, or None."""
+    cards = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
+    return cards[0] if cards else None
+
+
+def log_transition(kind, seconds, signal):
+    TRANSITION_LOG.append((kind, seconds, signal))
+    print(f"   [{kind}] ready in {seconds:.2f}s ({signal})")
+
+
+def wait_for_transition(driver, kind, old_card, old_url):
+    """
+    Waits until the page shows new content after a click: the URL (filter or page
+    parameter) changed, or the review card that was first before the click is gone
+    (stale) or replaced by another one. The URL check also covers a first card node
+    that is reused across the transition. When there was no card to compare with,
+    the first card appearing is enough.
+    Gives up after WAIT_TIMEOUTS[kind] seconds and continues like the old fixed sleep did.
+    :return: the signal that made the page ready, or 'timeout'
+    """
+    def ready(d):
+        if d.current_url != old_url:
+            return "url changed"
+        if old_card is not None:
+            try:
+                old_card.is_enabled()  # any call on a replaced element raises
+            except StaleElementReferenceException:
+                return "cards replaced"
+            card = first_card(d)
+            return "cards replaced" if card is not None and card != old_card else False
+        return "cards loaded" if first_card(d) is not None else False
+
+    start = time.perf_counter()
+    try:
+        signal = WebDriverWait(driver, WAIT_TIMEOUTS[kind], poll_frequency=0.1).until(ready)
+    except TimeoutException:
+        signal = "timeout"
+    log_transition(kind, time.perf_counter() - start, signal)
+    return signal
+
+
+def load_base_page(driver):
+    """Opens BASE_URL and waits for the first review card (instead of a fixed sleep)."""
+    start = time.perf_counter()
+    driver.get(BASE_URL)
+    try:
+        WebDriverWait(driver, WAIT_TIMEOUTS['load'], poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR))
+        )
+        signal = "cards loaded"
+    except TimeoutException:
+        signal = "timeout"
+    log_transition('load', time.perf_counter() - start, signal)
+
+
+def print_transition_summary():
+    """Count, mean and max wait per kind of transition."""
+    if not TRANSITION_LOG:
+        return
+    print("\nPage transition times:")
+    for kind in WAIT_TIMEOUTS:
+        times = [seconds for k, seconds, _ in TRANSITION_LOG if k == kind]
+        if times:
+            timeouts = sum(1 for k, _, signal in TRANSITION_LOG if k == kind and signal == "timeout")
+            print(f"  {kind}: {len(times)} waits, mean {sum(times) / len(times):.2f}s, "
+                  f"max {max(times):.2f}s, {timeouts} timeouts")
+
+
 def clean_dates(date_iso_str):
     """
     Casts '2024-11-22T14:30:00.000Z' a '2024-11-22'
@@ -43,6 +222,139 @@ def clean_dates(date_iso_str):
         return date_iso_str
 
 
+def clean_rating(value):
+    """
+    Casts the stars of a card ('4' or 4) to int; None if missing or not 1-5
+    """
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+def review_fingerprint(subject, review):
+    """
+    Normalized (subject, review) key: Unicode NFKC, case-folded and with
+    collapsed whitespace, hashed to 16 hex chars so the index stays small.
+    """
+    def norm(text):
+        text = unicodedata.normalize('NFKC', text or "")
+        return re.sub(r"\s+", " ", text).strip().casefold()
+
+    key = norm(subject) + "\x1f" + norm(review)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ReviewIndex:
+    """
+    Set of review fingerprints with O(1) membership checks.
+    Fingerprints loaded from disk belong to previous runs ('stored'); the ones
+    added during this run are tracked apart so in-run duplicates can still be told apart.
+    """
+
+    def __init__(self, path=None, stored=()):
+        self.path = path
+        self.stored = set(stored)
+        self.added = set()
+        self._lock = threading.Lock()  # shared by the workers in parallel mode
+
+    @classmethod
+    def for_output(cls, output_file):
+        """
+        Loads the index saved next to output_file. If the output exists but the
+        index does not (first run with this version), it is built once from the CSV.
+        Without the output there is nothing to skip, so the index starts empty.
+        """
+        path = output_file + INDEX_SUFFIX
+        if not os.path.exists(output_file):
+            return cls(path)
+
+        if os.path.exists(path):
+            with open(path, encoding='ascii') as fh:
+                return cls(path, (line.strip() for line in fh if line.strip()))
+
+        df = pd.read_csv(output_file, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        # The first two columns are always subject and review (Subject/Review or Asunto/Reseña)
+        index = cls(path, (review_fingerprint(s, r) for s, r in zip(df.iloc[:, 0], df.iloc[:, 1])))
+        index.save()
+        return index
+
+    def check(self, fingerprint):
+        """
+        Registers the review fingerprint and returns 'new', 'duplicate' (already
+        seen in this run) or 'stored' (saved by a previous run).
+        """
+        with self._lock:
+            if fingerprint in self.added:
+                return 'duplicate'
+            if fingerprint in self.stored:
+                return 'stored'
+            self.added.add(fingerprint)
+            return 'new'
+
+    def save(self):
+        """Writes all fingerprints atomically (temporary file + rename)."""
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='ascii') as fh:
+            for fingerprint in sorted(self.stored | self.added):
+                fh.write(fingerprint + "\n")
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.stored | self.added)
+
+
+def load_state(output_file=OUTPUT_FILE):
+    """
+    High-water marks of the previous run: {rating: {"date": "YYYY-MM-DD", "fingerprint": "..."}}.
+    Empty if there is no state file or no output to append to.
+    """
+    path = output_file + STATE_SUFFIX
+    if not os.path.exists(output_file) or not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as fh:
+        return {int(rating): mark for rating, mark in json.load(fh).items()}
+
+
+def save_state(state, output_file=OUTPUT_FILE):
+    """Writes the high-water marks atomically (temporary file + rename)."""
+    path = output_file + STATE_SUFFIX
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump({str(rating): mark for rating, mark in sorted(state.items())}, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_reviews(data, output_file=OUTPUT_FILE):
+    """
+    Appends the new reviews to output_file (it is created with a header if missing).
+    Columns keep the same order as the existing file, so old headers still line up.
+    """
+    df = pd.DataFrame(data, columns=["Subject", "Review", "Date", "Rating"])
+    if os.path.exists(output_file):
+        df.to_csv(output_file, mode='a', header=False, index=False, encoding='utf-8')
+    else:
+        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    return len(df)
+
+
+def save_reviews_to_store(data, store_dir):
+    """
+    Appends the new reviews to the Parquet review store shared with tellapart.py
+    and the insight API (partition source=trustpilot, language=all).
+    """
+    if INSIGHT_DIR not in sys.path:
+        sys.path.insert(0, INSIGHT_DIR)
+    from review_store import ReviewStore, to_store_frame
+
+    df = pd.DataFrame(data, columns=["Subject", "Review", "Date", "Rating"])
+    frame = to_store_frame(df, {column: column for column in df.columns})
+    return ReviewStore(store_dir).write(frame, source="trustpilot", language="all")
+
+
 def select_rating(driver, rating):
     """
     Selects the checkbox for the specified rating.
@@ -64,7 +376,7 @@ def select_rating(driver, rating):
 
         # Search the checkbox element
 
-        checkbox = WebDriverWait(driver, 10).until(
+        checkbox = WebDriverWait(driver, WAIT_TIMEOUTS['load']).until(
             EC.presence_of_element_located((By.ID, checkbox_id))
         )
 
@@ -73,8 +385,9 @@ def select_rating(driver, rating):
         if not checkbox.is_selected():
             # Click on the associated label
             label = driver.find_element(By.CSS_SELECTOR, f"label[for='{checkbox_id}']")
+            old_card, old_url = first_card(driver), driver.current_url
             driver.execute_script("arguments[0].click();", label)
-            time.sleep(2)  # Wait for the filtered content to load
+            wait_for_transition(driver, 'filter', old_card, old_url)  # Wait for the filtered content to load
 
         return True
     except Exception as e:
@@ -108,8 +421,9 @@ def unselect_rating(driver, rating):
 
         if checkbox.is_selected():
             label = driver.find_element(By.CSS_SELECTOR, f"label[for='{checkbox_id}']")
+            old_card, old_url = first_card(driver), driver.current_url
             driver.execute_script("arguments[0].click();", label)
-            time.sleep(2)
+            wait_for_transition(driver, 'filter', old_card, old_url)
 
         return True
     except Exception as e:
@@ -124,7 +438,7 @@ def click_next(driver):
     """
     try:
         # Look for the button "Next"
-        next_button = WebDriverWait(driver, 5).until(
+        next_button = WebDriverWait(driver, WAIT_TIMEOUTS['next']).until(
 
             EC.presence_of_element_located((By.CSS_SELECTOR, "a.link_internal__Eam_b.button_button__EM6gX[name='pagination-button-next']"))
         )
@@ -135,175 +449,389 @@ def click_next(driver):
             return False
 
         # Click the button using JS to avoid overlay issues
+        old_card, old_url = first_card(driver), driver.current_url
         driver.execute_script("arguments[0].click();", next_button)
 
-        time.sleep(3)  # Wait for the next page to load
+        wait_for_transition(driver, 'page', old_card, old_url)  # Wait for the next page to load
         return True
     except (TimeoutException, NoSuchElementException):
         return False
 
 
-def scrapping_trustpilot_profesional():
+def extract_card_selenium(card):
+    """
+    Reads one card through the driver (one round-trip per lookup).
+    :return: {"date", "subject", "review", "rating"} or None if the card went stale
+    """
+    try:
+        try:
+            date_clean = clean_dates(card.find_element(By.TAG_NAME, "time").get_attribute("datetime"))
+        except NoSuchElementException:
+            date_clean = None
+
+        try:
+            rating = clean_rating(card.find_element(By.CSS_SELECTOR, f"[{RATING_ATTRIBUTE}]").get_attribute(RATING_ATTRIBUTE))
+        except NoSuchElementException:
+            rating = None
+
+        fields = {}
+        for field, selectors, default in (("subject", TITLE_SELECTORS, "No subject"), ("review", BODY_SELECTORS, "")):
+            fields[field] = default
+            for selector in selectors:
+                try:
+                    fields[field] = card.find_element(By.CSS_SELECTOR, selector).text.strip()
+                    break
+                except NoSuchElementException:
+                    continue
+
+        return {"date": date_clean, **fields, "rating": rating}
+    except Exception:
+        return None
 
+
+def _rendered_text(element):
     """
-    function to scrape Trust Pilot reviews for OBB
-    :return:
+    Text of a BeautifulSoup element as the browser shows it (like Selenium's .text):
+    whitespace collapsed, <br> as line breaks, trimmed.
     """
+    for br in element.find_all("br"):
+        br.replace_with("\ue000")
+    text = re.sub(r"\s+", " ", element.get_text())
+    return re.sub(r" ?\ue000 ?", "\n", text).strip()
 
-    driver = start_driver()
-    if not driver: return []
 
-    dataset_final = []
+def parse_cards_html(html):
+    """
+    Parses every review card of a page in-process, with the same selectors and
+    fallbacks as the Selenium path.
+    :return: list of {"date", "subject", "review", "rating"}
+    """
+    if BeautifulSoup is None:
+        raise RuntimeError("The 'html' extractor needs beautifulsoup4 (pip install beautifulsoup4)")
+
+    soup = BeautifulSoup(html, "html.parser")
+    cards = []
+    for selector in CARD_SELECTORS:
+        cards = soup.select(selector)
+        if cards:
+            break
+
+    items = []
+    for card in cards:
+        time_elem = card.find("time")
+        item = {"date": clean_dates(time_elem.get("datetime")) if time_elem else None}
+        for field, selectors, default in (("subject", TITLE_SELECTORS, "No subject"), ("review", BODY_SELECTORS, "")):
+            elem = next((e for e in (card.select_one(sel) for sel in selectors) if e is not None), None)
+            item[field] = _rendered_text(elem) if elem is not None else default
+        rating_elem = card.select_one(f"[{RATING_ATTRIBUTE}]")
+        item["rating"] = clean_rating(rating_elem.get(RATING_ATTRIBUTE)) if rating_elem is not None else None
+        items.append(item)
+    return items
+
+
+def parse_cards_next_data(html):
+    """
+    Reads the reviews from the page-data JSON embedded by Next.js (<script id="__NEXT_DATA__">),
+    without touching the DOM. Same fields as the card selectors: published date, title, text, stars.
+    :return: list of {"date", "subject", "review", "rating"}
+    """
+    match = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.S)
+    if not match:
+        return []
+
+    page_props = json.loads(match.group(1)).get("props", {}).get("pageProps", {})
+    items = []
+    for review in page_props.get("reviews") or []:
+        title = review.get("title")
+        items.append({
+            "date": clean_dates((review.get("dates") or {}).get("publishedDate")),
+            "subject": title.strip() if title is not None else "No subject",
+            "review": (review.get("text") or "").strip(),
+            "rating": clean_rating(review.get("rating")),
+        })
+    return items
+
+
+def extract_page(driver, cards, extractor='selenium'):
+    """
+    Reviews of the page currently open in the driver.
+    - 'selenium': one driver lookup per field and card (lazy, so the date stop
+      condition avoids reading the cards after it)
+    - 'html': the rendered DOM is read once (page_source) and parsed in-process
+    - 'json': the embedded __NEXT_DATA__ of the rendered page (page_source) is parsed,
+      without a second request for the same URL
+    """
+    if extractor == 'selenium':
+        return (extract_card_selenium(card) for card in cards)
+    if extractor == 'html':
+        return parse_cards_html(driver.page_source)
+    if extractor == 'json':
+        return parse_cards_next_data(driver.page_source)
+    raise ValueError(f"Unknown extractor: {extractor}")
 
-    print("--- STARTING STRUCTURED EXTRACTION ---")
-    print("Reviews from 2023 onwards will be extracted(Max 10 pages per rating)")
 
-    # Load the base page
-    driver.get(BASE_URL)
-    time.sleep(3)
+def save_page_html(driver, rating, page):
+    """Keeps the HTML of the page as an offline fixture when HTML_DUMP_DIR is set."""
+    if not HTML_DUMP_DIR:
+        return
+    os.makedirs(HTML_DUMP_DIR, exist_ok=True)
+    with open(os.path.join(HTML_DUMP_DIR, f"rating{rating}_page{page}.html"), "w", encoding="utf-8") as fh:
+        fh.write(driver.page_source)
 
-    # 1. Loop through Ratings (5 stars down to 1)
-    ratings_to_scrape = [5, 4, 3, 2, 1]
 
-    for rating in ratings_to_scrape:
-        print(f"\nStarting extraction of {rating}-star reviews...")
+def scrape_rating(driver, rating, index, mark=None, extractor='selenium'):
+    """
+    Pages through the reviews of one rating (the filter must already be selected).
+    :param index: shared ReviewIndex, reviews already seen are skipped
+    :param mark: high-water mark of the previous run; paging stops when it is reached
+    :param extractor: 'selenium', 'html' or 'json' (see extract_page)
+    :return: (list of new reviews, newest review seen as {"date", "fingerprint"} or None)
+    """
+    # Control variable to break the page loop if the date is old
+    stop_rating_loop = False
+    page = 1
+
+    reviews = []
+    newest = None
+
+    # 2. Loop through Pages (NOW MAX 10 PAGES)
+    while page <= 10:
+
+        # If the old date flag is activated, break this loop
+        if stop_rating_loop:
+            break
+
+        print(f"  Processing page {page}...")
+        
+        # 3. Find the 'Cards'
+        try:
+            WebDriverWait(driver, WAIT_TIMEOUTS['page']).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR))
+            )
+        except TimeoutException:
+            print(f"   No reviews found on page {page}. End of content for {rating}-star reviews.")
+            break
+
+        cards = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
+
+        if not cards:
+            cards = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTORS[1])
+
+        if not cards:
+            print(f"   No reviews found on page {page}. End of content for {rating}-star reviews.")
+            break
+
+        save_page_html(driver, rating, page)
+
+        count_page = 0
+        count_skipped = 0  # Counter for reviews skipped due to being duplicates or invalid
+        count_stored = 0  # Reviews already saved by a previous run
+        # 4. Relative Extraction (Within each card)
+        try:
+            items = extract_page(driver, cards, extractor)
+        except Exception as e:
+            print(f"   Could not extract page {page} with the '{extractor}' extractor: {e}")
+            break
+
+        for item in items:
+            if item is None:
+                continue
+
+            # --- DATE first (To check stop condition) ---
+            date_clean = item["date"]
+
+            # --- STOP CONDITION BY DATE ---
+            # If we have a date, check the year
+            if date_clean:
+                try:
+                    review_year = int(date_clean[:4])  # The first 4 chars are the year
+                    if review_year < 2023:
+                        print(
+                            f" Old date detected ({date_clean}). Stopping search for {rating}-star reviews.")
+                        stop_rating_loop = True
+                        break  # Break the CARDS loop (goes to check stop_rating_loop)
+                except:
+                    pass  # If conversion fails, continue for safety
+
+                # --- STOP CONDITION BY HIGH-WATER MARK (incremental mode) ---
+                if mark and date_clean < mark['date']:
+                    print(f" Reached reviews older than the last run ({mark['date']}). "
+                          f"Stopping search for {rating}-star reviews.")
+                    stop_rating_loop = True
+                    break
 
-        # Deselect any previous rating and select the current one
-        if rating < 5:
+            # A. Title (subject) and B. REVIEW
+            subject, review = item["subject"], item["review"]
 
-            unselect_rating(driver, rating + 1)
+            # D. Save DATA (check for duplicates in constant time)
+            if len(subject) > 1 or len(review) > 1:
+                fingerprint = review_fingerprint(subject, review)
 
-        if not select_rating(driver, rating):
+                if newest is None and date_clean:
+                    newest = {"date": date_clean, "fingerprint": fingerprint}
 
-            print(f" Could not select rating {rating}. Skipping...")
-            continue
+                if mark and fingerprint == mark['fingerprint']:
+                    print(f" Reached the newest review of the last run. "
+                          f"Stopping search for {rating}-star reviews.")
+                    stop_rating_loop = True
+                    break
 
-        # Control variable to break the page loop if the date is old
-        stop_rating_loop = False
-        page = 1
+                status = index.check(fingerprint)
 
-        # 2. Loop through Pages (NOW MAX 10 PAGES)
-        while page <= 10:
+                if status == 'new':
+                    reviews.append({
+                        "Subject": subject,
+                        "Review": review,
+                        "Date": date_clean,
+                        "Rating": item.get("rating") or int(rating)  # the card's stars, else the filter's
+                    })
+                    count_page += 1
+                elif status == 'stored':
+                    count_stored += 1
+                else:
+                    count_skipped += 1
 
-            # If the old date flag is activated, break this loop
-            if stop_rating_loop:
-                break
+        print(f"   -> Page {page}: {count_page} new reviews extracted, {count_skipped} duplicates skipped, "
+              f"{count_stored} already saved, {len(cards)} cards in total.")
 
-            print(f"  Processing page {page}...")
-            
-            # 3. Find the 'Cards'
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "article[class*='styles_reviewCard']"))
-                )
-            except TimeoutException:
-                print(f"   No reviews found on page {page}. End of content for {rating}-star reviews.")
-                break
+        # If all reviews were duplicates, there are probably no more real pages
+        if count_page == 0 and count_skipped > 0:
+            print(f"   WARNING: All reviews on page {page} have already been extracted. No more pages for {rating}-star reviews.")
+            break
+
+        # If an old date is found, exit the loop
+        if stop_rating_loop:
+            break
 
-            cards = driver.find_elements(By.CSS_SELECTOR, "article[class*='styles_reviewCard']")
+        # Try to go to the next page using the button
+        if page < 10:
 
-            if not cards:
-                cards = driver.find_elements(By.CSS_SELECTOR, "div[class*='styles_reviewCard']")
+            if not click_next(driver):
 
-            if not cards:
-                print(f"   No reviews found on page {page}. End of content for {rating}-star reviews.")
+                print(f"   No 'Next' button. End of pages for {rating}-star reviews.")
                 break
+            page += 1
+        else:
+            print(f"   Reached the maximum of 10 pages for {rating}-star reviews.")
+            break
 
-            count_page = 0
-            count_skipped = 0  # Counter for reviews skipped due to being duplicates or invalid
-            # 4. Relative Extraction (Within each card)
-            for card in cards:
-                try:
-                    # --- Extract DATE first (To check stop condition) ---
-                    date_clean = None
-                    try:
-                        date_elem = card.find_element(By.TAG_NAME, "time")
-                        raw_date = date_elem.get_attribute("datetime")
-
-                        date_clean = clean_dates(raw_date)
-
-                    except:
-                        date_clean = None
-
-                    # --- STOP CONDITION BY DATE ---
-                    # If we have a date, check the year
-                    if date_clean:
-                        try:
-                            review_year = int(date_clean[:4])  # The first 4 chars are the year
-                            if review_year < 2023:
-                                print(
-                                    f" Old date detected ({date_clean}). Stopping search for {rating}-star reviews.")
-                                stop_rating_loop = True
-                                break  # Break the CARDS loop (goes to check stop_rating_loop)
-                        except:
-                            pass  # If conversion fails, continue for safety
-                    # A. Extract title (subject) of the review
-                    try:
-                        title_elem = card.find_element(By.CSS_SELECTOR, "h2[class*='CDS_Typography_heading']")
-                        subject = title_elem.text.strip()
-                    except:
-                        try:
-                            title_elem = card.find_element(By.CSS_SELECTOR, "[data-service-review-title-typography='true']")
-                            subject = title_elem.text.strip()
-                        except:
-                            subject = "No subject"
-
-                    # B. Extract REVIEW
-                    try:
-                        body_elem = card.find_element(By.CSS_SELECTOR, "[data-service-review-text-typography='true']")
-                        review = body_elem.text.strip()
-                    except:
-                        try:
-                            body_elem = card.find_element(By.CSS_SELECTOR, "p[class*='typography_body']")
-                            review = body_elem.text.strip()
-                        except:
-                            review = ""
-
-                    # D. Save DATA (check for duplicates)
-                    if len(subject) > 1 or len(review) > 1:
-                        # Check if this review already exists
-                        is_duplicate = False
-                        for item in dataset_final:
-                            if item['Review'] == review and item['Subject'] == subject:
-                                is_duplicate = True
-                                break
-
-                        if not is_duplicate:
-                            dataset_final.append({
-                                "Subject": subject,
-                                "Review": review,
-                                "Date": date_clean,
-                                "Rating": int(rating)
-                            })
-                            count_page += 1
-                        else:
-                            count_skipped += 1
+    return reviews, newest
+
+
+def scrape_rating_with_pool(pool, rating, index, mark=None, extractor='selenium'):
+    """
+    Parallel-mode task: borrows a driver, opens the base page (no filter selected)
+    and scrapes one rating with it.
+    :return: same as scrape_rating
+    """
+    with pool.driver() as driver:
+        if driver is None:
+            print(f" Could not start a driver for rating {rating}. Skipping...")
+            return [], None
+
+        load_base_page(driver)
+
+        if not select_rating(driver, rating):
+            print(f" Could not select rating {rating}. Skipping...")
+            return [], None
+
+        print(f"\nStarting extraction of {rating}-star reviews...")
+        return scrape_rating(driver, rating, index, mark, extractor)
+
+
+def update_state(state, rating, newest):
+    """Moves the high-water mark forward (never back, e.g. if page 1 failed to load)."""
+    old_mark = state.get(rating)
+    if newest and (not old_mark or newest['date'] >= old_mark['date']):
+        state[rating] = newest
+
+
+def scrapping_trustpilot_profesional_parallel(workers, index=None, state=None, incremental=False, extractor='selenium'):
+    """
+    Parallel version: each rating filter is crawled in its own headless browser,
+    taken from a pool of at most `workers` drivers. Results are merged in the
+    usual rating order (5 to 1) and de-duplicated through the shared index.
+    Parameters and return value as in scrapping_trustpilot_profesional.
+    """
+    if index is None:
+        index = ReviewIndex()
+    if state is None:
+        state = {}
 
+    print(f"--- STARTING STRUCTURED EXTRACTION ({workers} browsers) ---")
+    print("Reviews from 2023 onwards will be extracted(Max 10 pages per rating)")
+
+    pool = DriverPool(workers)
+    dataset_final = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                rating: executor.submit(scrape_rating_with_pool, pool, rating, index,
+                                        state.get(rating) if incremental else None, extractor)
+                for rating in RATINGS
+            }
+
+            for rating, future in futures.items():
+                try:
+                    reviews, newest = future.result()
                 except Exception as e:
+                    print(f"Error while extracting rating {rating}: {e}")
                     continue
+                dataset_final.extend(reviews)
+                update_state(state, rating, newest)
+    finally:
+        pool.close()
 
-            print(f"   -> Page {page}: {count_page} new reviews extracted, {count_skipped} duplicates skipped, {len(cards)} cards in total.")
+    return dataset_final
 
-            # If all reviews were duplicates, there are probably no more real pages
-            if count_page == 0 and count_skipped > 0:
-                print(f"   WARNING: All reviews on page {page} have already been extracted. No more pages for {rating}-star reviews.")
-                break
 
-            # If an old date is found, exit the loop
-            if stop_rating_loop:
-                break
+def scrapping_trustpilot_profesional(index=None, state=None, incremental=False, extractor='selenium'):
 
-            # Try to go to the next page using the button
-            if page < 10:
+    """
+    function to scrape Trust Pilot reviews for OBB
+    :param index: ReviewIndex of reviews already saved; those are not returned again
+    :param state: high-water marks per rating (see load_state). Updated in place with
+                  the newest review seen for each rating
+    :param incremental: stop paging a rating once its high-water mark is reached
+                        (same review, or an older date) instead of crawling back to 2023
+    :param extractor: how the cards of each page are read: 'selenium', 'html' or 'json'
+    :return: list of new reviews (dicts)
+    """
 
-                if not click_next(driver):
+    driver = start_driver()
+    if not driver: return []
 
-                    print(f"   No 'Next' button. End of pages for {rating}-star reviews.")
-                    break
-                page += 1
-            else:
-                print(f"   Reached the maximum of 10 pages for {rating}-star reviews.")
-                break
+    dataset_final = []
+    if index is None:
+        index = ReviewIndex()
+    if state is None:
+        state = {}
+
+    print("--- STARTING STRUCTURED EXTRACTION ---")
+    print("Reviews from 2023 onwards will be extracted(Max 10 pages per rating)")
+
+    # Load the base page
+    load_base_page(driver)
+
+    # 1. Loop through Ratings (5 stars down to 1)
+    for rating in RATINGS:
+        print(f"\nStarting extraction of {rating}-star reviews...")
+
+        # Deselect any previous rating and select the current one
+        if rating < 5:
+
+            unselect_rating(driver, rating + 1)
+
+        if not select_rating(driver, rating):
+
+            print(f" Could not select rating {rating}. Skipping...")
+            continue
+
+        # Newest known review for this rating (reviews are listed newest first)
+        mark = state.get(rating) if incremental else None
+        reviews, newest = scrape_rating(driver, rating, index, mark, extractor)
+        dataset_final.extend(reviews)
+        update_state(state, rating, newest)
 
     driver.quit()
     return dataset_final
@@ -311,14 +839,62 @@ def scrapping_trustpilot_profesional():
 
 # --- MAIN ---
 if __name__ == "__main__":
-    data = scrapping_trustpilot_profesional()
+    parser = argparse.ArgumentParser(description="Scrape Trustpilot reviews for OBB.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch reviews newer than the last run (stops at the saved high-water marks)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Headless browsers crawling ratings in parallel (max {len(RATINGS)}, one per rating)")
+    parser.add_argument("--extractor", choices=EXTRACTORS, default='selenium',
+                        help="How cards are read: Selenium lookups per field, the page HTML parsed "
+                             "in-process (needs beautifulsoup4), or the embedded page-data JSON of the page")
+    parser.add_argument("--store", metavar="DIR", default=None,
+                        help="Also append the new reviews to this Parquet review store (needs pyarrow)")
+    parser.add_argument("--save-html", metavar="DIR", default=None,
+                        help="Save the HTML of every crawled page in DIR (fixtures for --parse-html)")
+    parser.add_argument("--parse-html", metavar="FILE", nargs="+", default=None,
+                        help="Offline: run the 'html' (default) or 'json' extractor on saved pages and print the reviews")
+    for kind, seconds in WAIT_TIMEOUTS.items():
+        parser.add_argument(f"--{kind}-timeout", type=float, default=seconds,
+                            help=f"Max seconds for the '{kind}' wait (default {seconds})")
+    args = parser.parse_args()
+    WAIT_TIMEOUTS.update({kind: getattr(args, f"{kind}_timeout") for kind in WAIT_TIMEOUTS})
+    HTML_DUMP_DIR = args.save_html
+
+    if args.parse_html:
+        parse = parse_cards_next_data if args.extractor == 'json' else parse_cards_html
+        for path in args.parse_html:
+            with open(path, encoding="utf-8") as fh:
+                items = parse(fh.read())
+            print(f"{path}: {len(items)} reviews")
+            for item in items:
+                print(f"  {item['date']} | {item['subject'][:60]} | {item['review'][:80]!r}")
+        raise SystemExit(0)
+
+    index = ReviewIndex.for_output(OUTPUT_FILE)
+    state = load_state(OUTPUT_FILE)
+    print(f"{len(index)} reviews already saved in {OUTPUT_FILE}")
+    if args.incremental and not state:
+        print("No previous state found: crawling all pages this time.")
+
+    workers = min(args.workers, len(RATINGS))
+    if workers > 1:
+        data = scrapping_trustpilot_profesional_parallel(workers, index, state, incremental=args.incremental,
+                                                         extractor=args.extractor)
+    else:
+        data = scrapping_trustpilot_profesional(index, state, incremental=args.incremental, extractor=args.extractor)
 
     if data:
-        df = pd.DataFrame(data)
+        added = save_reviews(data, OUTPUT_FILE)
+        index.save()  # only after the rows are on disk, so the index never gets ahead of the CSV
+        print(f"\n File saved: {OUTPUT_FILE} ({added} new reviews)")
 
-        file_name = "OBB_Reviews_Completo_TP.csv"
-        df.to_csv(file_name, index=False, encoding='utf-8-sig')
-        print(f"\n File saved: {file_name}")
+        if args.store:
+            print(f" Review store updated: {args.store} ({save_reviews_to_store(data, args.store)} rows)")
 
     else:
-        print(" Failed to extract data.")
\ No newline at end of file
+        print(" No new reviews extracted.")
+
+    if state and os.path.exists(OUTPUT_FILE):
+        save_state(state, OUTPUT_FILE)
+
+    print_transition_summary()
\ No newline at end of file